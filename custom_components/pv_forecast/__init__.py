@@ -2,22 +2,54 @@
 import logging
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.core import Event, HomeAssistant
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
 
 from .const import (
+    DATA_TIMESERIES,
     DOMAIN,
     CONF_API_KEY,
     CONF_PROVINCE,
     CONF_DAYS_TO_FORECAST,
     CONF_GRANULARITY,
     CONF_SCAN_INTERVAL,
+    CONF_TRACK_ACCURACY,
+    CONF_ACCURACY_WINDOW,
+    DEFAULT_ACCURACY_WINDOW,
+    STORAGE_VERSION,
+    TIMESERIES_FILE,
 )
 from .coordinator import PVForecastDataUpdateCoordinator
+from .services import async_setup_services
+from .timeseries import ForecastStore
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.SENSOR]
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, _config: ConfigType) -> bool:
+    """Set up the time-series store and service actions shared by all entries."""
+    # Opened once here rather than by the first entry, so entries set up
+    # concurrently cannot open a connection each
+    timeseries = await hass.async_add_executor_job(
+        ForecastStore, hass.config.path(TIMESERIES_FILE)
+    )
+    hass.data[DATA_TIMESERIES] = timeseries
+
+    async def async_close_timeseries(_event: Event) -> None:
+        """Close the time-series store when Home Assistant stops."""
+        # Refreshes finishing after this no longer write to the store
+        hass.data.pop(DATA_TIMESERIES, None)
+        await hass.async_add_executor_job(timeseries.close)
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_close_timeseries)
+    async_setup_services(hass)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -29,9 +61,18 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         days_to_forecast=entry.data.get(CONF_DAYS_TO_FORECAST, 7),
         granularity=entry.data.get(CONF_GRANULARITY, "Hour"),
         scan_interval=entry.data.get(CONF_SCAN_INTERVAL, "6 hours"),
+        entry_id=entry.entry_id,
+        accuracy_window=(
+            entry.data.get(CONF_ACCURACY_WINDOW, DEFAULT_ACCURACY_WINDOW)
+            if entry.data.get(CONF_TRACK_ACCURACY)
+            else None
+        ),
     )
 
-    await coordinator.async_config_entry_first_refresh()
+    entry.async_on_unload(coordinator.register_granularity())
+    entry.async_on_unload(coordinator.async_schedule_rollover())
+
+    await coordinator.async_restore_or_refresh(entry)
 
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
 
@@ -46,3 +87,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass.data[DOMAIN].pop(entry.entry_id)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the persisted forecast of a removed config entry."""
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}").async_remove()
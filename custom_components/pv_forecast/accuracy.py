@@ -0,0 +1,121 @@
+"""Streaming forecast accuracy for PV Forecast NED.nl.
+
+The daily totals forecast for each day are remembered per horizon (how
+many days ahead they were forecast). Once a day's actual production is
+known, the errors of its forecasts are added to a fixed-size ring buffer
+per horizon, whose running sums give the mean absolute error and bias
+over the last days without scanning any history.
+"""
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable, Mapping
+from datetime import date, timedelta
+from typing import Any, NamedTuple
+
+MAX_PENDING_DAYS = 3  # Days after which a day without actuals is dropped
+
+
+class AccuracyStats(NamedTuple):
+    """Forecast accuracy of one horizon; errors are forecast minus actual."""
+
+    mae: float
+    bias: float
+    samples: int
+
+
+class RingBuffer:
+    """The last values appended, up to a fixed size, with running sums."""
+
+    def __init__(self, size: int, values: Iterable[float] = ()) -> None:
+        """Initialize the buffer, optionally with values oldest first."""
+        self._values = array("d", [0.0] * size)
+        self._next = 0
+        self._count = 0
+        self.total = 0.0
+        self.absolute_total = 0.0
+        for value in values:
+            self.append(value)
+
+    def append(self, value: float) -> None:
+        """Add a value, evicting the oldest one when the buffer is full."""
+        if self._count == len(self._values):
+            evicted = self._values[self._next]
+            self.total -= evicted
+            self.absolute_total -= abs(evicted)
+        else:
+            self._count += 1
+        self._values[self._next] = value
+        self.total += value
+        self.absolute_total += abs(value)
+        self._next = (self._next + 1) % len(self._values)
+
+    def __len__(self) -> int:
+        """Return the number of values in the buffer."""
+        return self._count
+
+    def values(self) -> list[float]:
+        """Return the values in the buffer, oldest first."""
+        start = self._next if self._count == len(self._values) else 0
+        return [self._values[(start + i) % len(self._values)] for i in range(self._count)]
+
+
+class AccuracyTracker:
+    """Forecast errors per horizon day over a rolling window of days."""
+
+    def __init__(self, horizons: int, window: int) -> None:
+        """Initialize the tracker for forecasts 0 to horizons - 1 days ahead."""
+        self.horizons = horizons
+        self.window = window
+        self._errors = [RingBuffer(window) for _ in range(horizons)]
+        # Latest forecast total of a day per horizon, until it has passed
+        self._pending: dict[date, list[float | None]] = {}
+
+    def record_forecast(self, today: date, totals: Mapping[date, float]) -> None:
+        """Remember the daily totals of a forecast made today."""
+        for day, total in totals.items():
+            if 0 <= (horizon := (day - today).days) < self.horizons:
+                self._pending.setdefault(day, [None] * self.horizons)[horizon] = total
+
+    def pending_days(self, today: date) -> list[date]:
+        """Return the days before today that still need their actuals.
+
+        Days that have waited too long for them are dropped.
+        """
+        oldest = today - timedelta(days=MAX_PENDING_DAYS)
+        for day in [day for day in self._pending if day < oldest]:
+            del self._pending[day]
+        return sorted(day for day in self._pending if day < today)
+
+    def record_actual(self, day: date, total: float) -> None:
+        """Score the forecasts of a day against its actual total."""
+        for horizon, forecast in enumerate(self._pending.pop(day, ())):
+            if forecast is not None:
+                self._errors[horizon].append(forecast - total)
+
+    def stats(self, horizon: int) -> AccuracyStats | None:
+        """Return the accuracy of forecasts a number of days ahead, if scored."""
+        errors = self._errors[horizon]
+        if not errors:
+            return None
+        return AccuracyStats(
+            errors.absolute_total / len(errors), errors.total / len(errors), len(errors)
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the tracker's state for storage."""
+        return {
+            "errors": [errors.values() for errors in self._errors],
+            "pending": {day.isoformat(): totals for day, totals in self._pending.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, horizons: int, window: int, data: Mapping[str, Any]) -> AccuracyTracker:
+        """Return a tracker restored from storage."""
+        tracker = cls(horizons, window)
+        for horizon, values in enumerate(data.get("errors", [])[:horizons]):
+            tracker._errors[horizon] = RingBuffer(window, values[-window:])
+        for day, totals in data.get("pending", {}).items():
+            totals = (list(totals) + [None] * horizons)[:horizons]
+            tracker._pending[date.fromisoformat(day)] = totals
+        return tracker
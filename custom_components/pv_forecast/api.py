@@ -0,0 +1,390 @@
+"""Client for the NED.nl utilizations API."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+import hashlib
+import logging
+import os
+import time
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+import aiohttp
+from homeassistant.util.json import json_loads
+
+from .ratelimit import (
+    MAX_RETRIES,
+    RETRY_STATUSES,
+    TokenBucket,
+    backoff_delay,
+    retry_after_seconds,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Can be pointed at a local stand-in (tests/fake_ned.py) for load testing
+API_URL = os.environ.get("NED_API_URL", "https://api.ned.nl/v1/utilizations")
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=30)
+MAX_CONCURRENT_PAGES = 4
+MAX_REMEMBERED_QUERIES = 4  # Queries whose pages are revalidated, not refetched
+# Utilization fields kept by default; everything else is dropped on decoding
+MEMBER_FIELDS = ("validfrom", "validto", "volume")
+# Utilization fields decoded as numbers
+NUMERIC_FIELDS = frozenset({"volume", "capacity", "percentage"})
+
+
+class NedApiError(Exception):
+    """Error communicating with the NED.nl API."""
+
+
+class NedApiAuthError(NedApiError):
+    """The NED.nl API rejected the API key."""
+
+
+class NedApiRetryError(NedApiError):
+    """The NED.nl API asked us to try again later."""
+
+    def __init__(self, status: int, retry_after: float | None) -> None:
+        """Initialize with the response status and requested delay."""
+        super().__init__(f"API returned {status}")
+        self.retry_after = retry_after
+
+
+@dataclass(slots=True)
+class _PageValidators:
+    """What we know about the last response for a page."""
+
+    etag: str | None
+    last_modified: str | None
+    digest: bytes
+    data: dict[str, Any]
+
+
+@dataclass(slots=True)
+class FetchStats:
+    """What an API client did since its statistics were last taken."""
+
+    requests: int = 0
+    pages: int = 0
+    not_modified: int = 0
+    retries: int = 0
+    bytes: int = 0
+    parse_time: float = 0.0
+    rate_limit_wait: float = 0.0
+
+
+class NedRequestCache:
+    """Coalesce identical requests and share their results for a while.
+
+    One instance is shared by all config entries, so entries asking for
+    the same data wait on a single in-flight request and reuse its result
+    until it expires. Keys start with the API key, which is left out of
+    log messages.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        """Initialize the cache with a time to live in seconds."""
+        self._ttl = ttl
+        self._results: dict[tuple[Any, ...], tuple[float, Any]] = {}
+        self._pending: dict[tuple[Any, ...], asyncio.Future[Any]] = {}
+        # Lookups answered from a cached or in-flight result, and the others
+        self.hits = 0
+        self.misses = 0
+
+    async def async_get(
+        self, key: tuple[Any, ...], fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Return the result for a key, fetching it if needed."""
+        now = time.monotonic()
+        if (cached := self._results.get(key)) is not None and cached[0] > now:
+            _LOGGER.debug("Serving cached result for %s", key[1:])
+            self.hits += 1
+            return cached[1]
+
+        if (pending := self._pending.get(key)) is None:
+            self.misses += 1
+            pending = self._pending[key] = asyncio.ensure_future(fetch())
+            pending.add_done_callback(lambda future: self._store(key, future))
+        else:
+            _LOGGER.debug("Joining in-flight request for %s", key[1:])
+            self.hits += 1
+
+        # Shield the shared request so one cancelled caller does not
+        # cancel it for everyone else.
+        return await asyncio.shield(pending)
+
+    def _store(self, key: tuple[Any, ...], future: asyncio.Future[Any]) -> None:
+        """Store the result of a finished request."""
+        self._pending.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+
+        now = time.monotonic()
+        self._results = {
+            cached_key: cached
+            for cached_key, cached in self._results.items()
+            if cached[0] > now
+        }
+        self._results[key] = (now + self._ttl, future.result())
+
+
+class NedApiClient:  # pylint: disable=too-many-instance-attributes
+    """Fetch utilizations from NED.nl over a shared aiohttp session."""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        api_key: str,
+        cache: NedRequestCache | None = None,
+        limiter: TokenBucket | None = None,
+        max_retries: int = MAX_RETRIES,
+        fields: tuple[str, ...] = MEMBER_FIELDS,
+    ) -> None:
+        """Initialize the client.
+
+        Only the given utilization fields are kept from responses.
+        """
+        self._session = session
+        self._api_key = api_key
+        self._cache = cache
+        self._limiter = limiter
+        self._max_retries = max_retries
+        self._fields = fields
+        self.stats = FetchStats()
+        self._pages: dict[tuple[Any, ...], _PageValidators] = {}
+        # Pages and merged result of the last fetches, oldest first
+        self._last: dict[
+            tuple[Any, ...], tuple[list[dict[str, Any]], dict[str, Any]]
+        ] = {}
+
+    def take_stats(self) -> FetchStats:
+        """Return the statistics gathered so far and start over."""
+        stats, self.stats = self.stats, FetchStats()
+        return stats
+
+    async def async_get_all_utilizations(
+        self, params: dict[str, Any], page_size: int
+    ) -> dict[str, Any]:
+        """Return all pages of a utilizations query as one ordered series.
+
+        Identical queries are shared through the request cache, if any.
+        """
+        if self._cache is None:
+            return await self._async_fetch_all(params, page_size)
+
+        key = (self._api_key, *_page_key(params))
+        return await self._cache.async_get(
+            key, lambda: self._async_fetch_all(params, page_size)
+        )
+
+    async def _async_fetch_all(
+        self, params: dict[str, Any], page_size: int
+    ) -> dict[str, Any]:
+        """Fetch all pages of a utilizations query.
+
+        The first page tells us how many pages there are; the remaining
+        pages are then fetched concurrently. When the response only links
+        to the next page, pages are followed one by one instead.
+
+        If no page changed since the last fetch, the previous result is
+        returned as is, so callers can detect an unchanged forecast by
+        identity.
+        """
+        params = {**params, "itemsPerPage": page_size}
+        first = await self.async_get_utilizations({**params, "page": 1})
+        pages = [first]
+
+        last_page = _last_page(first)
+        if last_page is not None and last_page > 1:
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_PAGES)
+
+            async def fetch_page(page: int) -> dict[str, Any]:
+                async with semaphore:
+                    return await self.async_get_utilizations({**params, "page": page})
+
+            pages += await asyncio.gather(
+                *(fetch_page(page) for page in range(2, last_page + 1))
+            )
+        elif last_page is None:
+            page = pages[-1]
+            while (next_page := _page_number(_view(page).get("hydra:next"))) is not None:
+                page = await self.async_get_utilizations({**params, "page": next_page})
+                pages.append(page)
+
+        _LOGGER.debug("Fetched %s page(s) of utilizations", len(pages))
+        query = _page_key(params)
+        last = self._last.pop(query, None)
+        if last is not None and len(pages) == len(last[0]) and all(
+            page is previous for page, previous in zip(pages, last[0])
+        ):
+            _LOGGER.debug("Utilizations unchanged since the last fetch")
+            result = last[1]
+        else:
+            members = [member for page in pages for member in page.get("hydra:member", [])]
+            members.sort(key=lambda member: member["validfrom"])
+            result = {"hydra:member": members, "hydra:totalItems": len(members)}
+
+        self._last[query] = (pages, result)
+        if len(self._last) > MAX_REMEMBERED_QUERIES:
+            del self._last[next(iter(self._last))]
+        # Forget validators of pages that are no longer part of a remembered query
+        used = {
+            _page_key({**dict(key), "page": page})
+            for key, (remembered, _) in self._last.items()
+            for page in range(1, len(remembered) + 1)
+        }
+        self._pages = {key: page for key, page in self._pages.items() if key in used}
+        return result
+
+    async def async_get_utilizations(self, params: dict[str, Any]) -> dict[str, Any]:
+        """Return the JSON-LD response for a single utilizations page.
+
+        Requests wait for the rate limiter, and rate limited or failed
+        requests are retried after the Retry-After delay or a jittered
+        exponential backoff.
+        """
+        attempt = 0
+        while True:
+            if self._limiter is not None and (wait := self._limiter.reserve()) > 0:
+                _LOGGER.debug("Waiting %.1f s for the rate limiter", wait)
+                self.stats.rate_limit_wait += wait
+                await asyncio.sleep(wait)
+
+            try:
+                return await self._async_request(params)
+            except NedApiRetryError as err:
+                if attempt >= self._max_retries:
+                    raise
+                delay = err.retry_after
+                if delay is None:
+                    delay = backoff_delay(attempt)
+                attempt += 1
+                self.stats.retries += 1
+                _LOGGER.debug("%s, retrying in %.1f s", err, delay)
+                if self._limiter is not None:
+                    # Hold back the other entries as well
+                    self._limiter.pause(delay)
+                else:
+                    self.stats.rate_limit_wait += delay
+                    await asyncio.sleep(delay)
+
+    async def _async_request(self, params: dict[str, Any]) -> dict[str, Any]:
+        """Send a single utilizations request.
+
+        The request is conditional on the ETag or Last-Modified of the last
+        response for the same page. When the server does not support that,
+        an unchanged body is recognised by its digest and not parsed again.
+        """
+        headers = {
+            "X-AUTH-TOKEN": self._api_key,
+            "accept": "application/ld+json",
+        }
+        key = _page_key(params)
+        if (cached := self._pages.get(key)) is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        self.stats.requests += 1
+        try:
+            async with self._session.get(
+                API_URL,
+                headers=headers,
+                params=params,
+                timeout=REQUEST_TIMEOUT,
+            ) as response:
+                if response.status in (401, 403):
+                    raise NedApiAuthError(f"API key rejected ({response.status})")
+                if response.status in RETRY_STATUSES:
+                    raise NedApiRetryError(
+                        response.status,
+                        retry_after_seconds(response.headers.get("Retry-After")),
+                    )
+                if response.status == 304 and cached is not None:
+                    self.stats.pages += 1
+                    self.stats.not_modified += 1
+                    return cached.data
+                response.raise_for_status()
+                body = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            raise NedApiError(err) from err
+
+        self.stats.pages += 1
+        self.stats.bytes += len(body)
+        digest = hashlib.sha1(body, usedforsecurity=False).digest()
+        if cached is not None and cached.digest == digest:
+            data = cached.data
+        else:
+            started = time.perf_counter()
+            try:
+                data = _lean_page(json_loads(body), self._fields)
+            except (ValueError, TypeError, AttributeError) as err:
+                raise NedApiError(f"Invalid response: {err}") from err
+            self.stats.parse_time += time.perf_counter() - started
+
+        self._pages[key] = _PageValidators(
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            digest=digest,
+            data=data,
+        )
+        return data
+
+
+def _lean_page(data: dict[str, Any], fields: tuple[str, ...]) -> dict[str, Any]:
+    """Return a page with only its pagination and the given member fields.
+
+    The JSON-LD metadata and unused fields of every utilization would
+    otherwise be kept in memory for as long as the forecast is.
+    """
+    page = {
+        "hydra:member": [
+            {
+                field: float(member[field])
+                if field in NUMERIC_FIELDS and member[field] is not None
+                else member[field]
+                for field in fields
+                if field in member
+            }
+            for member in data.get("hydra:member", [])
+        ]
+    }
+    for key in ("hydra:totalItems", "hydra:view"):
+        if key in data:
+            page[key] = data[key]
+    return page
+
+
+def _page_key(params: dict[str, Any]) -> tuple[Any, ...]:
+    """Return a hashable key for the parameters of a page request."""
+    return tuple(sorted(params.items()))
+
+
+def _view(data: dict[str, Any]) -> dict[str, Any]:
+    """Return the hydra:view block of a response."""
+    return data.get("hydra:view") or {}
+
+
+def _page_number(url: str | None) -> int | None:
+    """Return the page number from a hydra page link."""
+    if not url:
+        return None
+    page = parse_qs(urlsplit(url).query).get("page")
+    return int(page[0]) if page else None
+
+
+def _last_page(data: dict[str, Any]) -> int | None:
+    """Return the number of pages in a response, if it can be determined."""
+    view = _view(data)
+    if (last := _page_number(view.get("hydra:last"))) is not None:
+        return last
+    if "hydra:next" not in view:
+        return 1
+    # The server may cap the page size, so go by what it actually returned.
+    per_page = len(data.get("hydra:member", []))
+    if (total := data.get("hydra:totalItems")) is not None and per_page:
+        return -(-int(total) // per_page)
+    return None
@@ -14,11 +14,17 @@ from .const import (
     CONF_DAYS_TO_FORECAST,
     CONF_GRANULARITY,
     CONF_SCAN_INTERVAL,
+    CONF_ATTRIBUTE_MODE,
+    CONF_TRACK_ACCURACY,
+    CONF_ACCURACY_WINDOW,
     DEFAULT_DAYS_TO_FORECAST,
     DEFAULT_GRANULARITY,
+    DEFAULT_ATTRIBUTE_MODE,
+    DEFAULT_ACCURACY_WINDOW,
     PROVINCE_MAPPING,
     GRANULARITY_OPTIONS,
     SCAN_INTERVAL_OPTIONS,
+    ATTRIBUTE_MODE_OPTIONS,
 )
 
 
@@ -35,8 +41,7 @@ class PVForecastConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         if user_input is not None:
             # Validate the API key by trying to get data
-            valid = await self.hass.async_add_executor_job(
-                self._test_api_key,
+            valid = await self._async_test_api_key(
                 user_input[CONF_API_KEY],
                 user_input[CONF_PROVINCE],
             )
@@ -64,12 +69,19 @@ class PVForecastConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     vol.Optional(
                         CONF_SCAN_INTERVAL, default="6 hours"
                     ): vol.In(list(SCAN_INTERVAL_OPTIONS.keys())),
+                    vol.Optional(
+                        CONF_ATTRIBUTE_MODE, default=DEFAULT_ATTRIBUTE_MODE
+                    ): vol.In(ATTRIBUTE_MODE_OPTIONS),
+                    vol.Optional(CONF_TRACK_ACCURACY, default=False): bool,
+                    vol.Optional(
+                        CONF_ACCURACY_WINDOW, default=DEFAULT_ACCURACY_WINDOW
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=365)),
                 }
             ),
             errors=errors,
         )
 
-    def _test_api_key(self, api_key: str, province: str) -> bool:
+    async def _async_test_api_key(self, api_key: str, province: str) -> bool:
         """Test if the API key is valid."""
         try:
             # Import here to avoid circular import
@@ -80,6 +92,6 @@ class PVForecastConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 api_key=api_key,
                 province=province,
             )
-            return coordinator.test_api_key()
+            return await coordinator.async_test_api_key()
         except Exception:  # pylint: disable=broad-except
             return False
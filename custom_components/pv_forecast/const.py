@@ -3,6 +3,12 @@ from typing import Final
 from datetime import timedelta
 
 DOMAIN: Final = "pv_forecast"
+DATA_REQUEST_CACHE: Final = f"{DOMAIN}_request_cache"
+DATA_GRANULARITIES: Final = f"{DOMAIN}_granularities"
+DATA_RATE_LIMITER: Final = f"{DOMAIN}_rate_limiter"
+DATA_TIMESERIES: Final = f"{DOMAIN}_timeseries"
+TIMESERIES_FILE: Final = f"{DOMAIN}.db"
+STORAGE_VERSION: Final = 1
 
 # Configuration and options
 CONF_API_KEY = "api_key"
@@ -10,11 +16,22 @@ CONF_PROVINCE = "province"
 CONF_DAYS_TO_FORECAST = "days_to_forecast"
 CONF_GRANULARITY = "granularity"
 CONF_SCAN_INTERVAL = "scan_interval"
+CONF_ATTRIBUTE_MODE = "attribute_mode"
+CONF_TRACK_ACCURACY = "track_accuracy"
+CONF_ACCURACY_WINDOW = "accuracy_window"
 
 # Defaults
 DEFAULT_DAYS_TO_FORECAST = 7
 DEFAULT_GRANULARITY = "Hour"
+DEFAULT_ATTRIBUTE_MODE = "Full"
+DEFAULT_ACCURACY_WINDOW = 30  # Days of forecast errors per horizon
 DEFAULT_SCAN_INTERVAL = timedelta(hours=6)  # 6 hours default
+DEFAULT_PAGE_SIZE = 200  # Entries per API page
+# Share identical requests this long: long enough for entries polling within
+# the schedule's stagger window, shorter than its first retry of a late run
+REQUEST_CACHE_TTL = timedelta(minutes=5)
+NEAR_TERM_DAYS = 2  # UTC days at the start of the window refetched every poll
+FULL_REFRESH_INTERVAL = timedelta(days=1)  # Refetch the whole window this often
 
 # Scan interval options
 SCAN_INTERVAL_OPTIONS = {
@@ -23,6 +40,16 @@ SCAN_INTERVAL_OPTIONS = {
     "24 hours": timedelta(hours=24),
 }
 
+# Attribute modes for the forecast detail of each sensor
+ATTRIBUTE_MODE_FULL = "Full"  # hourly_data as a list of intervals
+ATTRIBUTE_MODE_COMPACT = "Compact"  # detail as start, step and values
+ATTRIBUTE_MODE_NONE = "None"  # no detail, use the get_detail service
+ATTRIBUTE_MODE_OPTIONS = [
+    ATTRIBUTE_MODE_FULL,
+    ATTRIBUTE_MODE_COMPACT,
+    ATTRIBUTE_MODE_NONE,
+]
+
 # Province mapping
 PROVINCE_MAPPING = {
     "Groningen": 1,
@@ -47,3 +74,9 @@ GRANULARITY_MAPPING = {
     "Hour": 5,
     "Day": 6,
 }
+GRANULARITY_DURATION = {
+    "10 minutes": timedelta(minutes=10),
+    "15 minutes": timedelta(minutes=15),
+    "Hour": timedelta(hours=1),
+    "Day": timedelta(days=1),
+}
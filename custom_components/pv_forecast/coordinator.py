@@ -1,26 +1,111 @@
 """DataUpdateCoordinator for PV Forecast NED.nl."""
-from datetime import datetime, timedelta
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
 import logging
+import time
 from typing import Any
 
-from homeassistant.core import HomeAssistant
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
-import requests
+from homeassistant.util import dt as dt_util
 
+from .accuracy import AccuracyTracker
+from .api import FetchStats, NedApiClient, NedApiError, NedRequestCache
 from .const import (
+    DATA_GRANULARITIES,
+    DATA_RATE_LIMITER,
+    DATA_REQUEST_CACHE,
+    DATA_TIMESERIES,
+    DEFAULT_PAGE_SIZE,
     DOMAIN,
+    FULL_REFRESH_INTERVAL,
+    NEAR_TERM_DAYS,
     PROVINCE_MAPPING,
     GRANULARITY_MAPPING,
+    REQUEST_CACHE_TTL,
     SCAN_INTERVAL_OPTIONS,
+    STORAGE_VERSION,
 )
+from .energy import async_import_statistics
+from .forecast import ForecastIndex
+from .ratelimit import TokenBucket
+from .resample import resample, source_granularity
+from .schedule import PollSchedule, stagger
+from .timeseries import ForecastStore, SeriesKey
 
 _LOGGER = logging.getLogger(__name__)
-API_URL = "https://api.ned.nl/v1/utilizations"
 
-class PVForecastDataUpdateCoordinator(DataUpdateCoordinator):
+
+@dataclass(slots=True)
+class RefreshStats:  # pylint: disable=too-many-instance-attributes
+    """Timings and sizes of the last refresh; times are in seconds."""
+
+    finished: datetime | None = None
+    fetch_latency: float = 0.0
+    requests: int = 0
+    pages: int = 0
+    not_modified: int = 0
+    retries: int = 0
+    bytes: int = 0
+    entries: int = 0
+    parse_time: float = 0.0
+    aggregation_time: float = 0.0
+    rate_limit_wait: float = 0.0
+    cache_hit_rate: float | None = None  # Percentage, shared by all entries
+
+
+def merge_window(
+    responses: list[dict[str, Any]], start: datetime, end: datetime
+) -> dict[str, Any]:
+    """Merge responses into one series covering start up to end.
+
+    Later responses replace the entries of earlier ones with the same
+    start, and entries outside the window are dropped.
+    """
+    members: dict[datetime, dict[str, Any]] = {}
+    for response in responses:
+        for member in response.get("hydra:member", []):
+            moment = datetime.fromisoformat(member["validfrom"])
+            if start <= moment < end:
+                members[moment] = member
+    merged = [members[moment] for moment in sorted(members)]
+    return {"hydra:member": merged, "hydra:totalItems": len(merged)}
+
+
+def _revised(
+    previous: dict[str, Any] | None, data: dict[str, Any], window: tuple[str, str, str]
+) -> bool:
+    """Return whether data revises the entries previous has in its window."""
+    if previous is None:
+        return True
+    start, end = _utc_date(window[1]), _utc_date(window[2])
+    current = {member["validfrom"]: member for member in data["hydra:member"]}
+    return any(
+        current.get(member["validfrom"]) != member
+        for member in merge_window([previous], start, end)["hydra:member"]
+    )
+
+
+def _utc_date(value: str) -> datetime:
+    """Return the start of a YYYY-MM-DD date filter in UTC."""
+    return datetime.fromisoformat(value).replace(tzinfo=dt_util.UTC)
+
+
+def stats_signal(entry_id: str | None) -> str:
+    """Return the dispatcher signal sent when an entry's refresh stats change."""
+    return f"{DOMAIN}_{entry_id}_stats"
+
+
+class PVForecastDataUpdateCoordinator(DataUpdateCoordinator):  # pylint: disable=too-many-instance-attributes
     """Class to manage fetching PV Forecast NED.nl data."""
 
     def __init__(
@@ -32,64 +117,452 @@ class PVForecastDataUpdateCoordinator(DataUpdateCoordinator):
         days_to_forecast: int = 7,
         granularity: str = "Hour",
         scan_interval: str = "6 hours",
+        page_size: int = DEFAULT_PAGE_SIZE,
+        entry_id: str | None = None,
+        accuracy_window: int | None = None,
     ) -> None:
-        """Initialize."""
+        """Initialize.
+
+        With an accuracy window (in days), the forecast is scored against
+        the actual production of the days that have passed.
+        """
         self.api_key = api_key
         self.province = province
         self.days_to_forecast = days_to_forecast
         self.granularity = granularity
-
-        update_interval = SCAN_INTERVAL_OPTIONS[scan_interval]
-        _LOGGER.debug("Setting update interval to %s", update_interval)
+        self.page_size = page_size
+        self._forecast = ForecastIndex()
+        self._forecast_source: dict[str, Any] | None = None
+        self._fetched: dict[str, Any] | None = None
+        # Source granularity, UTC date range and time of the last full fetch
+        self._window: tuple[str, str, str] | None = None
+        self._full_fetch: datetime | None = None
+        self._client: NedApiClient | None = None
+        self._entry_id = entry_id
+        self._store: Store | None = None
+        self.stats = RefreshStats()
+        self.accuracy: AccuracyTracker | None = None
+        if accuracy_window:
+            self.accuracy = AccuracyTracker(days_to_forecast, accuracy_window)
+        # The scan interval is the longest we go without polling
+        self.schedule = PollSchedule(
+            SCAN_INTERVAL_OPTIONS[scan_interval], offset=stagger(entry_id)
+        )
 
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=update_interval,
+            update_interval=self.schedule.max_interval,
+            # Only notify the sensors when the forecast actually changed
+            always_update=False,
+        )
+
+    @property
+    def forecast(self) -> ForecastIndex:
+        """Return the forecast index for the current data.
+
+        The index is rebuilt only when the coordinator data changes.
+        """
+        if self.data is not self._forecast_source:
+            self._forecast = ForecastIndex.from_response(self.data)
+            self._forecast_source = self.data
+        return self._forecast
+
+    @property
+    def entry_id(self) -> str | None:
+        """Return the id of our config entry, if any."""
+        return self._entry_id
+
+    @property
+    def client(self) -> NedApiClient:
+        """Return the API client.
+
+        The client shares Home Assistant's HTTP session, a request cache and
+        a rate limiter with the coordinators of all other config entries.
+        """
+        if self._client is None:
+            cache = self.hass.data.setdefault(
+                DATA_REQUEST_CACHE, NedRequestCache(REQUEST_CACHE_TTL.total_seconds())
+            )
+            limiter = self.hass.data.setdefault(DATA_RATE_LIMITER, TokenBucket())
+            self._client = NedApiClient(
+                async_get_clientsession(self.hass), self.api_key, cache, limiter
+            )
+        return self._client
+
+    @property
+    def _group_key(self) -> tuple[str, str, int]:
+        """Return the key of the entries that can share fetched data."""
+        return (self.api_key, self.province, self.days_to_forecast)
+
+    def register_granularity(self) -> Callable[[], None]:
+        """Register our granularity with entries that share our data.
+
+        Entries for the same province and window fetch the finest
+        registered granularity once and resample it locally. Returns a
+        callback that removes the registration.
+        """
+        registry = self.hass.data.setdefault(DATA_GRANULARITIES, {})
+        granularities = registry.setdefault(self._group_key, [])
+        granularities.append(self.granularity)
+
+        def unregister() -> None:
+            granularities.remove(self.granularity)
+            if not granularities:
+                registry.pop(self._group_key, None)
+
+        return unregister
+
+    @property
+    def store(self) -> Store | None:
+        """Return the store persisting the last forecast, if any."""
+        if self._store is None and self._entry_id is not None:
+            self._store = Store(
+                self.hass, STORAGE_VERSION, f"{DOMAIN}.{self._entry_id}"
+            )
+        return self._store
+
+    @property
+    def timeseries(self) -> ForecastStore | None:
+        """Return the local time-series store shared by all entries, if open."""
+        return self.hass.data.get(DATA_TIMESERIES) if self.hass else None
+
+    @property
+    def series_key(self) -> SeriesKey:
+        """Return the key of our series in the local time-series store."""
+        return SeriesKey(
+            PROVINCE_MAPPING.get(self.province),
+            2,  # Solar
+            1,  # Forecast
+            GRANULARITY_MAPPING.get(self.granularity, 5),
+        )
+
+    async def async_get_day_entries(self, day: date) -> list[dict[str, Any]]:
+        """Return the forecast entries of a local day.
+
+        Days outside the current forecast are looked up in the local
+        time-series store instead of being downloaded again.
+        """
+        if (forecast_day := self.forecast.get(day)) is not None:
+            return forecast_day.entries
+        if self.timeseries is None:
+            return []
+
+        start = dt_util.start_of_local_day(day)
+        end = dt_util.start_of_local_day(day + timedelta(days=1))
+        members = await self.hass.async_add_executor_job(
+            self.timeseries.query, self.series_key, start, end
+        )
+        return [
+            {
+                "valid_from": member["validfrom"],
+                "valid_to": member["validto"],
+                "volume": member["volume"],
+            }
+            for member in members
+        ]
+
+    def async_schedule_rollover(self) -> Callable[[], None]:
+        """Push new states to the sensors at every local midnight.
+
+        The day buckets are keyed on local dates, so moving on to the next
+        day only needs the sensors to look up their new date; no API call
+        is made. Returns a callback that cancels the schedule.
+        """
+
+        @callback
+        def _handle_midnight(_now: datetime) -> None:
+            _LOGGER.debug("Local day rolled over, updating sensors")
+            self.async_update_listeners()
+
+        return async_track_time_change(
+            self.hass, _handle_midnight, hour=0, minute=0, second=0
         )
 
+    async def async_restore(self) -> timedelta | None:
+        """Restore the last persisted forecast.
+
+        Returns the age of the restored forecast, or None if there was
+        nothing to restore.
+        """
+        if self.store is None or (stored := await self.store.async_load()) is None:
+            return None
+
+        if (fetched := dt_util.parse_datetime(stored["fetched"])) is None:
+            return None
+
+        _LOGGER.debug("Restored forecast fetched at %s", fetched)
+        if self.accuracy is not None and "accuracy" in stored:
+            self.accuracy = AccuracyTracker.from_dict(
+                self.accuracy.horizons, self.accuracy.window, stored["accuracy"]
+            )
+        self.schedule.restored(fetched)
+        self._schedule_next(changed=False)
+        self.async_set_updated_data(stored["data"])
+        return dt_util.utcnow() - fetched
+
+    async def async_restore_or_refresh(self, entry: ConfigEntry) -> None:
+        """Load the forecast when an entry is set up.
+
+        The persisted forecast is served straight away, and only refreshed
+        in the background when it is older than the longest poll interval.
+        Only when there is nothing to restore do we wait for the API.
+        """
+        if (age := await self.async_restore()) is None:
+            await self.async_config_entry_first_refresh()
+        elif age >= self.schedule.max_interval:
+            entry.async_create_background_task(
+                self.hass, self.async_refresh(), f"{DOMAIN} refresh {entry.title}"
+            )
+
     async def _async_update_data(self) -> dict[str, Any]:
         """Update data via API."""
+        registered = self.hass.data.get(DATA_GRANULARITIES, {}).get(self._group_key, ())
+        source = source_granularity(self.granularity, registered)
+
+        params = self._build_params(source)
+        window = (source, params["validfrom[after]"], params["validfrom[strictly_before]"])
+        ranges = self._fetch_ranges(window)
+
+        started = time.perf_counter()
         try:
-            return await self.hass.async_add_executor_job(self._get_data)
-        except Exception as err:
+            parts = [
+                await self.client.async_get_all_utilizations(
+                    {**params, "validfrom[after]": after, "validfrom[strictly_before]": before},
+                    self.page_size,
+                )
+                for after, before in ranges
+            ]
+        except NedApiError as err:
+            self._schedule_next(changed=False)
             raise UpdateFailed(f"Error communicating with API: {err}") from err
+        finally:
+            fetch_latency = time.perf_counter() - started
+            fetch = self.client.take_stats()
 
-    def _get_data(self) -> dict[str, Any]:
-        """Get the latest data from the API."""
-        headers = {
-            "X-AUTH-TOKEN": self.api_key,
-            "accept": "application/ld+json"
-        }
+        if ranges == [window[1:]]:
+            data = parts[0]
+            self._full_fetch = dt_util.utcnow()
+        else:
+            _LOGGER.debug("Merging %s into the cached forecast", ranges)
+            data = merge_window(
+                [self._fetched, *parts], _utc_date(window[1]), _utc_date(window[2])
+            )
+
+        # The client hands back the same object when nothing changed
+        unchanged = self.data is not None and data is self._fetched
+        self._fetched = data
+        self._window = window
+
+        started = time.perf_counter()
+        if not unchanged and source != self.granularity:
+            _LOGGER.debug("Resampling %s data to %s", source, self.granularity)
+            data = resample(data, self.granularity)
+
+        # Merged, refetched and restored data are compared by content, at
+        # the granularity of this entry
+        if self.data is not None and (
+            unchanged or data["hydra:member"] == self.data["hydra:member"]
+        ):
+            _LOGGER.debug("Forecast unchanged, keeping current data")
+            await self._async_score_accuracy()
+            self._record_stats(fetch, fetch_latency, 0.0)
+            self._schedule_next(changed=False)
+            return self.data
+
+        # Moving the window on a day, or adding a day at its end, is no new
+        # forecast run; only revised entries within the old window are
+        self._schedule_next(changed=_revised(self.data, data, window))
 
-        start_date = datetime.now()
-        end_date = start_date + timedelta(days=self.days_to_forecast)
+        # Build the index now, so its cost is part of the refresh statistics
+        index = ForecastIndex.from_response(data)
+        aggregation_time = time.perf_counter() - started
+        if self.accuracy is not None:
+            self.accuracy.record_forecast(dt_util.now().date(), index.totals())
+            await self._async_score_accuracy()
+        self._record_stats(fetch, fetch_latency, aggregation_time, data)
+
+        await self._async_persist(data, index, parts, source)
+        # Until the data is replaced, sensors read the index of the old data
+        self._forecast = index
+        self._forecast_source = data
+        return data
+
+    async def _async_persist(
+        self,
+        data: dict[str, Any],
+        index: ForecastIndex,
+        parts: list[dict[str, Any]],
+        source: str,
+    ) -> None:
+        """Save a changed forecast to the local stores and the recorder."""
+        if self.timeseries is not None:
+            # Store what was fetched, at the granularity of this entry
+            members = [member for part in parts for member in part.get("hydra:member", [])]
+            if source != self.granularity:
+                members = resample({"hydra:member": members}, self.granularity)["hydra:member"]
+            await self.hass.async_add_executor_job(
+                self.timeseries.upsert, self.series_key, members
+            )
+        await async_import_statistics(self, index)
+        if self.store is not None:
+            stored = {"fetched": dt_util.utcnow().isoformat(), "data": data}
+            if self.accuracy is not None:
+                stored["accuracy"] = self.accuracy.as_dict()
+            await self.store.async_save(stored)
 
-        params = {
+    async def _async_score_accuracy(self) -> None:
+        """Score the forecasts of past days against their actual production.
+
+        Actuals are only requested for days that still await them, so this
+        usually costs one small request a day. The request is not part of
+        the refresh statistics, and failures are retried on the next
+        refresh.
+        """
+        if self.accuracy is None:
+            return
+        today = dt_util.now().date()
+        if not (days := self.accuracy.pending_days(today)):
+            return
+
+        # Summed per local day by the index, like the forecast itself
+        params = self._build_params(source_granularity(self.granularity, ()))
+        start = dt_util.as_utc(dt_util.start_of_local_day(days[0]))
+        end = dt_util.as_utc(dt_util.start_of_local_day(today))
+        if end.time():
+            end += timedelta(days=1)
+        try:
+            actuals = await self.client.async_get_all_utilizations(
+                {
+                    **params,
+                    "classification": 2,  # Actual production
+                    "validfrom[after]": start.strftime("%Y-%m-%d"),
+                    "validfrom[strictly_before]": end.strftime("%Y-%m-%d"),
+                },
+                self.page_size,
+            )
+        except NedApiError as err:
+            _LOGGER.debug("Could not fetch actual production: %s", err)
+            return
+        finally:
+            self.client.take_stats()
+
+        index = ForecastIndex.from_response(actuals)
+        for day in days:
+            actual = index.get(day)
+            day_end = dt_util.start_of_local_day(day + timedelta(days=1))
+            # Only score days whose production is known up to their end
+            if actual and datetime.fromisoformat(actual.entries[-1]["valid_to"]) >= day_end:
+                _LOGGER.debug("Scoring the forecasts of %s", day)
+                self.accuracy.record_actual(day, actual.total)
+
+    def _fetch_ranges(self, window: tuple[str, str, str]) -> list[tuple[str, str]]:
+        """Return the UTC date ranges of the window to request.
+
+        New forecast runs mostly revise the next few days, so once the
+        whole window has been fetched only the near term and days newly
+        added at the end of the window are requested. The rest is kept
+        from the last fetch, and the whole window is fetched again daily.
+        """
+        source, start, end = window
+        if (
+            self._fetched is None
+            or self._window is None
+            or self._window[0] != source
+            or self._full_fetch is None
+            or dt_util.utcnow() - self._full_fetch >= FULL_REFRESH_INTERVAL
+        ):
+            return [(start, end)]
+
+        near_end = _utc_date(start) + timedelta(days=NEAR_TERM_DAYS)
+        near_end = min(end, near_end.strftime("%Y-%m-%d"))
+        ranges = [(start, near_end)]
+        if (horizon := max(near_end, self._window[2])) < end:
+            ranges.append((horizon, end))
+        return ranges
+
+    def _schedule_next(self, changed: bool) -> None:
+        """Set the interval to the next poll of the publication schedule."""
+        now = dt_util.utcnow()
+        self.update_interval = self.schedule.next_poll(now, changed) - now
+        _LOGGER.debug(
+            "Forecast %s, polling again in %s",
+            "changed" if changed else "unchanged",
+            self.update_interval,
+        )
+
+    def _record_stats(
+        self,
+        fetch: FetchStats,
+        fetch_latency: float,
+        aggregation_time: float,
+        data: dict[str, Any] | None = None,
+    ) -> None:
+        """Record and announce the statistics of a refresh."""
+        cache = self.hass.data.get(DATA_REQUEST_CACHE)
+        lookups = cache.hits + cache.misses if cache is not None else 0
+        self.stats = RefreshStats(
+            finished=dt_util.utcnow(),
+            fetch_latency=fetch_latency,
+            requests=fetch.requests,
+            pages=fetch.pages,
+            not_modified=fetch.not_modified,
+            retries=fetch.retries,
+            bytes=fetch.bytes,
+            entries=len((data or self.data or {}).get("hydra:member", [])),
+            parse_time=fetch.parse_time,
+            aggregation_time=aggregation_time,
+            rate_limit_wait=fetch.rate_limit_wait,
+            cache_hit_rate=100 * cache.hits / lookups if lookups else None,
+        )
+        _LOGGER.debug(
+            "Refresh took %.3f s: %s page(s), %s bytes, %s entries, "
+            "%.3f s parsing, %.3f s aggregating, %.1f s rate limited",
+            fetch_latency,
+            fetch.pages,
+            fetch.bytes,
+            self.stats.entries,
+            fetch.parse_time,
+            aggregation_time,
+            fetch.rate_limit_wait,
+        )
+        async_dispatcher_send(self.hass, stats_signal(self._entry_id))
+
+    def _build_params(self, granularity: str | None = None) -> dict[str, Any]:
+        """Return the query parameters for the forecast window.
+
+        The API filters on UTC dates, so the window is widened to cover
+        whole local days from the start of today.
+        """
+        today = dt_util.start_of_local_day()
+        end = dt_util.start_of_local_day(today + timedelta(days=self.days_to_forecast))
+        start_date = dt_util.as_utc(today)
+        end_date = dt_util.as_utc(end)
+        if end_date.time():
+            end_date += timedelta(days=1)
+
+        return {
             "point": PROVINCE_MAPPING.get(self.province),
             "type": 2,  # Solar
             "classification": 1,  # Forecast
-            "granularity": GRANULARITY_MAPPING.get(self.granularity, 5),
+            "granularity": GRANULARITY_MAPPING.get(granularity or self.granularity, 5),
             "granularitytimezone": 0,
             "activity": 1,
             "validfrom[after]": start_date.strftime('%Y-%m-%d'),
             "validfrom[strictly_before]": end_date.strftime('%Y-%m-%d'),
         }
 
-        response = requests.get(
-            API_URL,
-            headers=headers,
-            params=params,
-            timeout=30
-        )
-        response.raise_for_status()
-        return response.json()
+    async def async_test_api_key(self) -> bool:
+        """Test if the API key is valid.
 
-    def test_api_key(self) -> bool:
-        """Test if the API key is valid."""
+        Only a single entry is requested, so validating the key does not
+        download a forecast that is thrown away.
+        """
         try:
-            self._get_data()
+            await self.client.async_get_utilizations(
+                {**self._build_params(), "itemsPerPage": 1, "page": 1}
+            )
             return True
-        except Exception:  # pylint: disable=broad-except
+        except NedApiError:
             return False
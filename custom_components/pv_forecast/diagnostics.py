@@ -0,0 +1,36 @@
+"""Diagnostics support for PV Forecast NED.nl."""
+from __future__ import annotations
+
+from dataclasses import asdict
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_API_KEY, DATA_REQUEST_CACHE, DOMAIN
+from .coordinator import PVForecastDataUpdateCoordinator
+
+TO_REDACT = {CONF_API_KEY}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: PVForecastDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    cache = hass.data.get(DATA_REQUEST_CACHE)
+    stats = asdict(coordinator.stats)
+    if stats["finished"] is not None:
+        stats["finished"] = stats["finished"].isoformat()
+
+    return {
+        "entry": async_redact_data(entry.data, TO_REDACT),
+        "last_update_success": coordinator.last_update_success,
+        "refresh": stats,
+        "request_cache": {
+            "hits": cache.hits if cache else 0,
+            "misses": cache.misses if cache else 0,
+        },
+        "forecast_days": len(coordinator.forecast),
+    }
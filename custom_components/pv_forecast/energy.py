@@ -0,0 +1,117 @@
+"""Energy dashboard support for PV Forecast NED.nl."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import logging
+from typing import TYPE_CHECKING
+
+from homeassistant.const import UnitOfEnergy
+from homeassistant.core import HomeAssistant
+from homeassistant.util import slugify
+
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from .coordinator import PVForecastDataUpdateCoordinator
+    from .forecast import ForecastIndex
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_get_solar_forecast(
+    hass: HomeAssistant, config_entry_id: str
+) -> dict[str, dict[str, float | int]] | None:
+    """Return the hourly solar forecast of an entry for the energy dashboard."""
+    if (coordinator := hass.data.get(DOMAIN, {}).get(config_entry_id)) is None:
+        return None
+    # Daily forecasts have no hourly curve
+    if not (hours := coordinator.forecast.hourly()):
+        return None
+
+    return {
+        "wh_hours": {
+            hour.isoformat(): round(volume * 1000)  # kWh to Wh
+            for hour, volume in hours.items()
+        }
+    }
+
+
+def statistic_id(entry_id: str) -> str:
+    """Return the id of the external statistic holding an entry's forecast.
+
+    Entries for the same province can have different granularities and
+    windows, so each entry keeps its own running sum.
+    """
+    return f"{DOMAIN}:forecast_{slugify(entry_id)}"
+
+
+async def async_import_statistics(
+    coordinator: PVForecastDataUpdateCoordinator, index: ForecastIndex
+) -> None:
+    """Import the hourly forecast of an index as external statistics in one batch.
+
+    The index is passed in because the coordinator's data is only replaced
+    after its refresh returns.
+
+    Hours already imported are overwritten, and the running sum continues
+    from the last hour before the forecast window.
+    """
+    hass = coordinator.hass
+    if (
+        hass is None
+        or coordinator.entry_id is None
+        or "recorder" not in hass.config.components
+    ):
+        return
+    if not (hours := index.hourly()):
+        return
+
+    # The recorder is only imported when it is loaded; the mean type is
+    # part of its statistics metadata since Home Assistant 2025.3
+    # pylint: disable=import-outside-toplevel,no-name-in-module
+    from homeassistant.components.recorder.models import (
+        StatisticData,
+        StatisticMeanType,
+        StatisticMetaData,
+    )
+    from homeassistant.components.recorder.statistics import (
+        async_add_external_statistics,
+    )
+
+    statistic = statistic_id(coordinator.entry_id)
+    total = await _async_sum_before(hass, statistic, next(iter(hours)))
+    statistics: list[StatisticData] = []
+    for hour, volume in hours.items():
+        total += volume
+        statistics.append(StatisticData(start=hour, state=volume, sum=total))
+
+    metadata = StatisticMetaData(
+        has_mean=False,
+        mean_type=StatisticMeanType.NONE,
+        has_sum=True,
+        name=f"PV Forecast {coordinator.province}",
+        source=DOMAIN,
+        statistic_id=statistic,
+        unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+    )
+    _LOGGER.debug("Importing %s hourly forecast statistics for %s", len(statistics), statistic)
+    async_add_external_statistics(hass, metadata, statistics)
+
+
+async def _async_sum_before(hass: HomeAssistant, statistic: str, start: datetime) -> float:
+    """Return the running sum of a statistic in the hour before start."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.components.recorder import get_instance
+    from homeassistant.components.recorder.statistics import statistics_during_period
+
+    previous = await get_instance(hass).async_add_executor_job(
+        statistics_during_period,
+        hass,
+        start - timedelta(hours=1),
+        start,
+        {statistic},
+        "hour",
+        None,
+        {"sum"},
+    )
+    return (previous.get(statistic) or [{}])[0].get("sum") or 0.0
@@ -0,0 +1,328 @@
+"""Parsed forecast data for PV Forecast NED.nl."""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from collections.abc import Iterator
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from typing import Any, NamedTuple
+
+from homeassistant.util import dt as dt_util
+
+MAX_CACHED_RANGES = 32  # Serialized ranges kept per index
+DAY_SECONDS = 86400
+
+
+class ForecastSeries(NamedTuple):
+    """Forecast intervals as parallel columns, sorted by start.
+
+    Starts and ends are UTC timestamps. The ISO 8601 strings are those of
+    the API response, so they are shared with it rather than copied.
+    """
+
+    starts: array
+    ends: array
+    volumes: array
+    valid_from: list[str]
+    valid_to: list[str]
+
+
+class ForecastDay:
+    """Forecast total of a single day, and its entries as a slice of the series.
+
+    The entries and their compact encoding are only built when asked for.
+    """
+
+    __slots__ = ("total", "_series", "_first", "_last", "_entries", "_compact")
+
+    def __init__(self, series: ForecastSeries, first: int, last: int) -> None:
+        """Initialize the day from the positions of its intervals."""
+        self.total = sum(series.volumes[first:last])
+        self._series = series
+        self._first = first
+        self._last = last
+        self._entries: list[dict[str, Any]] | None = None
+        self._compact: dict[str, Any] | None = None
+
+    @property
+    def entries(self) -> list[dict[str, Any]]:
+        """Return the entries of the day, in order."""
+        if self._entries is None:
+            series = self._series
+            self._entries = [
+                {
+                    "valid_from": series.valid_from[i],
+                    "valid_to": series.valid_to[i],
+                    "volume": series.volumes[i],
+                }
+                for i in range(self._first, self._last)
+            ]
+        return self._entries
+
+    @property
+    def compact(self) -> dict[str, Any]:
+        """Return the entries as a start, step and list of volumes.
+
+        Irregular series fall back to parallel lists of start times and
+        volumes.
+        """
+        if self._compact is None:
+            self._compact = _compact(self._series, self._first, self._last)
+        return self._compact
+
+    def __eq__(self, other: object) -> bool:
+        """Return whether two days have the same intervals."""
+        if not isinstance(other, ForecastDay):
+            return NotImplemented
+        return self._columns() == other._columns()
+
+    def _columns(self) -> tuple[Any, ...]:
+        """Return the intervals of the day, column by column."""
+        span = slice(self._first, self._last)
+        series = self._series
+        return (series.valid_from[span], series.valid_to[span], series.volumes[span])
+
+
+class ForecastInterval(NamedTuple):
+    """A single forecast interval."""
+
+    start: datetime
+    end: datetime
+    volume: float
+
+
+class ForecastIndex:
+    """Forecast intervals as one sorted series, with its slices per local day.
+
+    The API response is parsed once when the index is built, so sensors
+    can look up their day, or the interval at a moment, without walking
+    the whole response. The series is kept as typed arrays of UTC
+    timestamps and volumes rather than as objects per interval; days,
+    intervals and entries are derived from it when they are looked up.
+    """
+
+    def __init__(self, series: ForecastSeries | None = None) -> None:
+        """Initialize the index from a series sorted by start."""
+        if series is None:
+            series = ForecastSeries(array("d"), array("d"), array("d"), [], [])
+        self._starts = series.starts
+        self._ends = series.ends
+        self._volumes = series.volumes
+        self._cumulative = array("d", [0.0, *accumulate(self._volumes)])
+        self._days = {
+            day: ForecastDay(series, first, last)
+            for day, first, last in _day_slices(self._starts)
+        }
+        # Serialized ranges, least recently used first
+        self._ranges: OrderedDict[tuple[float, float, int | None], list[dict[str, Any]]] = (
+            OrderedDict()
+        )
+
+    @classmethod
+    def from_response(cls, data: dict[str, Any] | None) -> ForecastIndex:
+        """Build an index from a JSON-LD API response."""
+        if not data or "hydra:member" not in data:
+            return cls()
+
+        intervals = sorted(
+            (
+                _timestamp(datetime.fromisoformat(entry["validfrom"])),
+                _timestamp(datetime.fromisoformat(entry["validto"])),
+                float(entry["volume"]),
+                entry["validfrom"],
+                entry["validto"],
+            )
+            for entry in data["hydra:member"]
+        )
+        if not intervals:
+            return cls()
+        starts, ends, volumes, valid_from, valid_to = zip(*intervals)
+        return cls(
+            ForecastSeries(
+                array("d", starts),
+                array("d", ends),
+                array("d", volumes),
+                list(valid_from),
+                list(valid_to),
+            )
+        )
+
+    def get(self, day: date) -> ForecastDay | None:
+        """Return the forecast for a day, if any."""
+        return self._days.get(day)
+
+    def totals(self) -> dict[date, float]:
+        """Return the total of every day in the index."""
+        return {day: forecast_day.total for day, forecast_day in self._days.items()}
+
+    def interval_at(self, moment: datetime) -> ForecastInterval | None:
+        """Return the interval containing a moment, if any."""
+        timestamp = moment.timestamp()
+        i = bisect_right(self._starts, timestamp) - 1
+        if i >= 0 and timestamp < self._ends[i]:
+            return self._interval(i)
+        return None
+
+    def next_interval(self, moment: datetime) -> ForecastInterval | None:
+        """Return the first interval starting after a moment, if any."""
+        i = bisect_right(self._starts, moment.timestamp())
+        return self._interval(i) if i < len(self._starts) else None
+
+    def next_boundary(self, moment: datetime) -> datetime | None:
+        """Return the first interval start or end after a moment, if any."""
+        timestamp = moment.timestamp()
+        boundaries = []
+        if (i := bisect_right(self._starts, timestamp)) < len(self._starts):
+            boundaries.append(self._starts[i])
+        if (i := bisect_right(self._ends, timestamp)) < len(self._ends):
+            boundaries.append(self._ends[i])
+        if not boundaries:
+            return None
+        return datetime.fromtimestamp(min(boundaries), dt_util.UTC)
+
+    def remaining(self, moment: datetime, until: datetime) -> float:
+        """Return the volume of intervals not yet ended that start before until."""
+        first = bisect_right(self._ends, moment.timestamp())
+        last = bisect_left(self._starts, until.timestamp())
+        if last <= first:
+            return 0.0
+        return self._cumulative[last] - self._cumulative[first]
+
+    def peak(self, start: datetime, end: datetime) -> ForecastInterval | None:
+        """Return the interval with the highest volume starting in a range."""
+        first = bisect_left(self._starts, start.timestamp())
+        last = bisect_left(self._starts, end.timestamp())
+        i = max(range(first, last), key=self._volumes.__getitem__, default=None)
+        return self._interval(i) if i is not None else None
+
+    def hourly(self) -> dict[datetime, float]:
+        """Return the volume per UTC hour, in order.
+
+        Intervals longer than an hour are skipped: spreading a daily total
+        over its hours would invent production at night.
+        """
+        hours: dict[float, float] = {}
+        for start, end, volume in zip(self._starts, self._ends, self._volumes):
+            if end - start > 3600:
+                continue
+            hour = start // 3600 * 3600
+            hours[hour] = hours.get(hour, 0.0) + volume
+        return {
+            datetime.fromtimestamp(hour, dt_util.UTC): volume
+            for hour, volume in sorted(hours.items())
+        }
+
+    def entries_between(
+        self, start: datetime, end: datetime, step: int | None = None
+    ) -> list[dict[str, Any]]:
+        """Return the entries starting in a range, optionally summed per step.
+
+        Steps are in seconds. Steps of whole days start at local midnight,
+        like the days of the sensors; shorter steps are aligned to UTC, like
+        resampled data. The serialized entries of recently requested ranges
+        are cached.
+        """
+        key = (_timestamp(start), _timestamp(end), step)
+        if (entries := self._ranges.get(key)) is not None:
+            self._ranges.move_to_end(key)
+            return entries
+
+        first = bisect_left(self._starts, key[0])
+        last = bisect_left(self._starts, key[1])
+        if step is None:
+            series = list(
+                zip(self._starts[first:last], self._ends[first:last], self._volumes[first:last])
+            )
+        else:
+            series = []
+            for i in range(first, last):
+                # The series is sorted, so a new bucket starts once one is passed
+                if not series or self._starts[i] >= series[-1][1]:
+                    series.append([*_bucket(self._starts[i], step), 0.0])
+                series[-1][2] += self._volumes[i]
+
+        entries = [
+            {
+                "valid_from": datetime.fromtimestamp(interval_start, dt_util.UTC).isoformat(),
+                "valid_to": datetime.fromtimestamp(interval_end, dt_util.UTC).isoformat(),
+                "volume": volume,
+            }
+            for interval_start, interval_end, volume in series
+        ]
+        self._ranges[key] = entries
+        if len(self._ranges) > MAX_CACHED_RANGES:
+            self._ranges.popitem(last=False)
+        return entries
+
+    def _interval(self, i: int) -> ForecastInterval:
+        """Return the interval at a position in the series."""
+        return ForecastInterval(
+            datetime.fromtimestamp(self._starts[i], dt_util.UTC),
+            datetime.fromtimestamp(self._ends[i], dt_util.UTC),
+            self._volumes[i],
+        )
+
+    def __len__(self) -> int:
+        """Return the number of days in the index."""
+        return len(self._days)
+
+
+def _timestamp(moment: datetime) -> float:
+    """Return the Unix timestamp of a moment; naive moments are in local time."""
+    if moment.tzinfo is None:
+        moment = dt_util.as_utc(moment)
+    return moment.timestamp()
+
+
+def _bucket(timestamp: float, step: int) -> tuple[float, float]:
+    """Return the start and end timestamps of the step containing a timestamp."""
+    if step % DAY_SECONDS:
+        start = timestamp // step * step
+        return start, start + step
+    day = dt_util.as_local(datetime.fromtimestamp(timestamp, dt_util.UTC)).date()
+    return (
+        dt_util.start_of_local_day(day).timestamp(),
+        dt_util.start_of_local_day(day + timedelta(days=step // DAY_SECONDS)).timestamp(),
+    )
+
+
+def _day_slices(starts: array) -> Iterator[tuple[date, int, int]]:
+    """Yield the local date, first and end position of every day in a series."""
+    day: date | None = None
+    first = 0
+    day_end = float("-inf")
+    for i, start in enumerate(starts):
+        if start >= day_end:
+            if day is not None:
+                yield day, first, i
+            # The API works in UTC, but days are what the user sees locally
+            day = dt_util.as_local(datetime.fromtimestamp(start, dt_util.UTC)).date()
+            day_end = dt_util.start_of_local_day(day + timedelta(days=1)).timestamp()
+            first = i
+    if day is not None:
+        yield day, first, len(starts)
+
+
+def _compact(series: ForecastSeries, first: int, last: int) -> dict[str, Any]:
+    """Encode the entries of a day compactly."""
+    volumes = series.volumes[first:last].tolist()
+    if first == last:
+        return {"values": volumes}
+
+    step = series.ends[first] - series.starts[first]
+    if all(
+        series.starts[i] - series.starts[first] == step * (i - first)
+        for i in range(first, last)
+    ):
+        return {
+            "start": series.valid_from[first],
+            "step": int(step),
+            "values": volumes,
+        }
+
+    return {
+        "valid_from": series.valid_from[first:last],
+        "values": volumes,
+    }
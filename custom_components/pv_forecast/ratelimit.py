@@ -0,0 +1,89 @@
+"""Rate limiting and retry helpers for NED.nl API requests.
+
+This module only uses the standard library and no relative imports, so the
+command line tool in ``src/main.py`` can use it as well.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import random
+import threading
+import time
+
+# ned.nl allows 200 requests per 5 minutes per API key
+DEFAULT_RATE = 200 / 300  # Requests per second
+DEFAULT_BURST = 10  # Requests that may be sent back to back
+
+MAX_RETRIES = 3
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+BACKOFF_BASE = 2.0  # Seconds before the first retry
+BACKOFF_MAX = 120.0  # Upper bound for a single backoff
+
+
+class TokenBucket:
+    """Token bucket shared by everything that talks to the API.
+
+    Callers reserve a token before each request and wait for the returned
+    delay, so requests are spread out instead of sent in bursts. A pause,
+    e.g. from a Retry-After header, delays all callers.
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        burst: float = DEFAULT_BURST,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize a full bucket."""
+        self._rate = rate
+        self._burst = burst
+        self._clock = clock
+        self._tokens = burst
+        self._updated = clock()
+        self._paused_until = 0.0
+        # The command line tool reserves tokens from worker threads
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return the seconds to wait before using it."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self._burst, self._tokens + (now - self._updated) * self._rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self._rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all requests for the given number of seconds."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Return a jittered exponential backoff for a retry attempt (0-based)."""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt)
+    return random.uniform(delay / 2, delay)
+
+
+def retry_after_seconds(value: str | None) -> float | None:
+    """Return the delay requested by a Retry-After header, if any.
+
+    The delay is capped at BACKOFF_MAX: a pause holds back every request,
+    so an hour-long Retry-After would stall all entries for an hour.
+    """
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return min(float(value), BACKOFF_MAX)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return min(max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds()), BACKOFF_MAX)
@@ -0,0 +1,104 @@
+"""Derive coarser forecast granularities from finer ones."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+import numpy as np
+
+from .const import GRANULARITY_DURATION
+from .forecast import DAY_SECONDS
+
+# The API sums days from UTC midnight; they are summed locally instead, from
+# local midnight like the days of the sensors
+LOCAL_GRANULARITIES = frozenset({"Day"})
+
+
+def source_granularity(requested: str, available: Iterable[str]) -> str:
+    """Return the finest granularity that can be resampled to the requested one.
+
+    Only granularities that divide the requested one evenly qualify, so a
+    10 minute series can serve Hour and Day, but not 15 minutes. Days are
+    never requested from the API, but summed from hours or finer.
+    """
+    requested_seconds = GRANULARITY_DURATION[requested].total_seconds()
+    candidates = [
+        granularity
+        for granularity in {requested, *available, "Hour"}
+        if requested_seconds % GRANULARITY_DURATION[granularity].total_seconds() == 0
+        and granularity not in LOCAL_GRANULARITIES
+    ]
+    return min(candidates, key=GRANULARITY_DURATION.__getitem__)
+
+
+def resample(data: dict[str, Any], granularity: str) -> dict[str, Any]:
+    """Sum a JSON-LD response into intervals of the given granularity.
+
+    Intervals shorter than a day are aligned to UTC, matching what the API
+    returns for granularitytimezone 0. Days start at local midnight; days
+    only partly covered by the response are left out, as the API filters
+    on UTC dates.
+    """
+    members = data.get("hydra:member", [])
+    if not members:
+        return {"hydra:member": []}
+
+    step = int(GRANULARITY_DURATION[granularity].total_seconds())
+    starts = np.fromiter(
+        (datetime.fromisoformat(member["validfrom"]).timestamp() for member in members),
+        dtype=np.float64,
+        count=len(members),
+    ).astype(np.int64)
+    volumes = np.fromiter(
+        (float(member["volume"]) for member in members),
+        dtype=np.float64,
+        count=len(members),
+    )
+
+    if step % DAY_SECONDS:
+        buckets, inverse = np.unique(starts // step * step, return_inverse=True)
+        totals = np.bincount(inverse, weights=volumes)
+        ends = buckets + step
+    else:
+        first, last = int(starts.min()), _timestamp(members[-1]["validto"])
+        boundaries = _local_midnights(first, last, step // DAY_SECONDS)
+        positions, inverse = np.unique(
+            np.searchsorted(boundaries, starts, side="right") - 1, return_inverse=True
+        )
+        totals = np.bincount(inverse, weights=volumes)
+        buckets, ends = boundaries[positions], boundaries[positions + 1]
+        complete = (buckets >= first) & (ends <= last)
+        buckets, ends, totals = buckets[complete], ends[complete], totals[complete]
+
+    return {
+        "hydra:member": [
+            {
+                "validfrom": _isoformat(start),
+                "validto": _isoformat(end),
+                "volume": volume,
+            }
+            for start, end, volume in zip(buckets.tolist(), ends.tolist(), totals.tolist())
+        ]
+    }
+
+
+def _local_midnights(first: int, last: int, days: int) -> np.ndarray:
+    """Return local midnights a number of days apart, around first up to last."""
+    day = dt_util.as_local(datetime.fromtimestamp(first, timezone.utc)).date()
+    midnights = [int(dt_util.start_of_local_day(day).timestamp())]
+    while midnights[-1] < last:
+        day += timedelta(days=days)
+        midnights.append(int(dt_util.start_of_local_day(day).timestamp()))
+    return np.array(midnights, dtype=np.int64)
+
+
+def _timestamp(value: str) -> int:
+    """Return the Unix timestamp of an ISO 8601 string."""
+    return int(datetime.fromisoformat(value).timestamp())
+
+
+def _isoformat(timestamp: int) -> str:
+    """Return a UTC ISO 8601 string for a Unix timestamp."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
@@ -0,0 +1,118 @@
+"""Publication-aware polling schedule for NED.nl forecasts.
+
+ned.nl publishes new forecast runs at a few fixed times per day. Instead of
+polling at a fixed interval, the schedule polls shortly after each expected
+run, retries with a growing backoff until the new run shows up, and learns
+how long after the expected time runs actually appear.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime, time, timedelta, timezone
+import hashlib
+
+# Expected forecast runs, in UTC
+DEFAULT_PUBLICATION_TIMES = (time(0), time(6), time(12), time(18))
+DEFAULT_DELAY = timedelta(minutes=30)  # Initial guess of a run's lag
+MIN_DELAY = timedelta(minutes=5)
+MAX_DELAY = timedelta(hours=3)
+RETRY_INTERVAL = timedelta(minutes=10)  # First retry while a run is late
+MAX_RETRY_INTERVAL = timedelta(hours=2)
+MIN_INTERVAL = timedelta(minutes=1)
+STAGGER_WINDOW = timedelta(minutes=4)  # Spread of the entries' poll times
+
+
+def stagger(key: str | None) -> timedelta:
+    """Return a stable offset within the stagger window for an entry."""
+    if key is None:
+        return timedelta()
+    digest = hashlib.sha1(key.encode(), usedforsecurity=False).digest()
+    return timedelta(
+        seconds=int.from_bytes(digest[:4], "big") % int(STAGGER_WINDOW.total_seconds())
+    )
+
+
+class PollSchedule:
+    """Decides when to poll next, given whether the last poll found new data.
+
+    The data is current when it changed after the latest expected run.
+    Current data is polled again shortly after the next expected run; data
+    that is not yet current is retried with an exponential backoff. No poll
+    is ever further away than max_interval.
+    """
+
+    def __init__(
+        self,
+        max_interval: timedelta,
+        publications: Iterable[time] = DEFAULT_PUBLICATION_TIMES,
+        *,
+        offset: timedelta = timedelta(),
+    ) -> None:
+        """Initialize the schedule."""
+        self.max_interval = max_interval
+        self.publications = sorted(publications)
+        self.offset = offset
+        self.delay = DEFAULT_DELAY
+        self._current: datetime | None = None  # Latest run we have data for
+        self._waiting_for: datetime | None = None
+        self._retry = RETRY_INTERVAL
+
+    def latest_publication(self, now: datetime) -> datetime:
+        """Return the latest expected run at or before now."""
+        day = now.astimezone(timezone.utc).date()
+        for days_back in range(2):
+            for moment in reversed(self.publications):
+                publication = datetime.combine(
+                    day - timedelta(days=days_back), moment, timezone.utc
+                )
+                if publication <= now:
+                    return publication
+        raise ValueError("No publication times")
+
+    def next_publication(self, now: datetime) -> datetime:
+        """Return the first expected run after now."""
+        day = now.astimezone(timezone.utc).date()
+        for days_ahead in range(2):
+            for moment in self.publications:
+                publication = datetime.combine(
+                    day + timedelta(days=days_ahead), moment, timezone.utc
+                )
+                if publication > now:
+                    return publication
+        raise ValueError("No publication times")
+
+    def restored(self, fetched: datetime) -> None:
+        """Record data fetched earlier, e.g. restored from storage."""
+        self._current = self.latest_publication(fetched)
+
+    def next_poll(self, now: datetime, changed: bool) -> datetime:
+        """Return when to poll next after a poll at now."""
+        latest = self.latest_publication(now)
+        waiting = self._current is None or self._current < latest
+
+        if changed:
+            if waiting and self._current is not None:
+                self._learn(now - latest, retried=self._waiting_for == latest)
+            self._current = latest
+            self._retry = RETRY_INTERVAL
+            waiting = False
+
+        if waiting:
+            if self._waiting_for != latest:
+                self._waiting_for = latest
+                self._retry = RETRY_INTERVAL
+            poll = now + self._retry
+            self._retry = min(self._retry * 2, MAX_RETRY_INTERVAL)
+        else:
+            poll = self.next_publication(now) + self.delay + self.offset
+
+        return min(max(poll, now + MIN_INTERVAL), now + self.max_interval)
+
+    def _learn(self, lag: timedelta, retried: bool) -> None:
+        """Adjust the expected lag of runs after finding a new one."""
+        if retried:
+            delay = (self.delay + lag) / 2
+        else:
+            # Found on the first poll, so it might have been there earlier
+            delay = self.delay * 3 / 4
+        self.delay = min(max(delay, MIN_DELAY), MAX_DELAY)
@@ -3,7 +3,9 @@ from __future__ import annotations
 
 import logging
 from typing import Any
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+
+import voluptuous as vol
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -11,18 +13,44 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.core import (
+    CALLBACK_TYPE,
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv, entity_platform
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_point_in_utc_time
 from homeassistant.helpers.typing import StateType
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
 )
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN
-from .coordinator import PVForecastDataUpdateCoordinator
+from .const import (
+    ATTRIBUTE_MODE_COMPACT,
+    ATTRIBUTE_MODE_FULL,
+    ATTRIBUTE_MODE_NONE,
+    CONF_ATTRIBUTE_MODE,
+    DEFAULT_ATTRIBUTE_MODE,
+    DOMAIN,
+)
+from .coordinator import PVForecastDataUpdateCoordinator, stats_signal
+from .forecast import ForecastInterval
 
 _LOGGER = logging.getLogger(__name__)
 
+ATTR_HOURLY_DATA = "hourly_data"
+ATTR_DETAIL = "detail"
+SERVICE_GET_DETAIL = "get_detail"
+ATTR_FORECAST_DATE = "forecast_date"
+
 # Define forecast periods
 FORECAST_PERIODS = {
     "today": {"days": 0, "name": "Today"},
@@ -34,6 +62,49 @@ FORECAST_PERIODS = {
     "in_6_days": {"days": 6, "name": "In 6 Days"},
 }
 
+# Define sensors for the current moment
+INTERVAL_SENSORS = {
+    "current_interval": {"name": "Current Interval"},
+    "next_interval": {"name": "Next Interval"},
+    "remaining_today": {"name": "Remaining Today"},
+    "peak_time": {"name": "Peak Time Today"},
+}
+
+# Define diagnostic sensors for the statistics of the last refresh
+DIAGNOSTIC_SENSORS = {
+    "fetch_latency": {
+        "name": "Fetch Latency",
+        "unit": UnitOfTime.MILLISECONDS,
+        "device_class": SensorDeviceClass.DURATION,
+        "scale": 1000,
+    },
+    "bytes": {
+        "name": "Bytes Transferred",
+        "unit": UnitOfInformation.BYTES,
+        "device_class": SensorDeviceClass.DATA_SIZE,
+    },
+    "pages": {"name": "Pages Fetched"},
+    "entries": {"name": "Forecast Entries"},
+    "parse_time": {
+        "name": "Parse Time",
+        "unit": UnitOfTime.MILLISECONDS,
+        "device_class": SensorDeviceClass.DURATION,
+        "scale": 1000,
+    },
+    "aggregation_time": {
+        "name": "Aggregation Time",
+        "unit": UnitOfTime.MILLISECONDS,
+        "device_class": SensorDeviceClass.DURATION,
+        "scale": 1000,
+    },
+    "cache_hit_rate": {"name": "Cache Hit Rate", "unit": PERCENTAGE},
+    "rate_limit_wait": {
+        "name": "Rate Limit Wait",
+        "unit": UnitOfTime.SECONDS,
+        "device_class": SensorDeviceClass.DURATION,
+    },
+}
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -42,6 +113,7 @@ async def async_setup_entry(
 ) -> None:
     """Set up the PV Forecast NED.nl sensors."""
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    attribute_mode = config_entry.data.get(CONF_ATTRIBUTE_MODE, DEFAULT_ATTRIBUTE_MODE)
 
     # Create a fixed set of forecast sensors
     sensors = []
@@ -53,10 +125,61 @@ async def async_setup_entry(
                 days_ahead=period_info["days"],
                 period_name=period_info["name"],
                 entry_id=config_entry.entry_id,
+                attribute_mode=attribute_mode,
             )
         )
 
-    async_add_entities(sensors, True)
+    for sensor_id, sensor_info in INTERVAL_SENSORS.items():
+        sensors.append(
+            PVForecastIntervalSensor(
+                coordinator=coordinator,
+                sensor_id=sensor_id,
+                sensor_name=sensor_info["name"],
+                entry_id=config_entry.entry_id,
+            )
+        )
+
+    for sensor_id, sensor_info in DIAGNOSTIC_SENSORS.items():
+        sensors.append(
+            PVForecastDiagnosticSensor(
+                coordinator=coordinator,
+                sensor_id=sensor_id,
+                sensor_info=sensor_info,
+                entry_id=config_entry.entry_id,
+            )
+        )
+
+    if coordinator.accuracy is not None:
+        for period_id, period_info in FORECAST_PERIODS.items():
+            if period_info["days"] < coordinator.accuracy.horizons:
+                sensors.append(
+                    PVForecastAccuracySensor(
+                        coordinator=coordinator,
+                        period_id=period_id,
+                        days_ahead=period_info["days"],
+                        period_name=period_info["name"],
+                        entry_id=config_entry.entry_id,
+                    )
+                )
+
+    # The coordinator already has data; updating before adding would make
+    # every sensor request a refresh from the API
+    async_add_entities(sensors)
+
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_GET_DETAIL,
+        {vol.Optional(ATTR_FORECAST_DATE): cv.date},
+        _async_get_detail,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+async def _async_get_detail(entity: SensorEntity, call: ServiceCall) -> ServiceResponse:
+    """Return the forecast detail of a forecast or interval sensor."""
+    if not isinstance(entity, (PVForecastSensor, PVForecastIntervalSensor)):
+        raise ServiceValidationError(f"{entity.entity_id} has no forecast detail")
+    return await entity.async_get_detail(call.data.get(ATTR_FORECAST_DATE))
 
 
 class PVForecastSensor(CoordinatorEntity, SensorEntity):
@@ -65,6 +188,9 @@ class PVForecastSensor(CoordinatorEntity, SensorEntity):
     _attr_native_unit_of_measurement = "kWh"
     _attr_device_class = SensorDeviceClass.ENERGY
     _attr_state_class = SensorStateClass.TOTAL
+    # The per-interval detail is large and changes with every refresh, so
+    # keep it out of the recorder database.
+    _unrecorded_attributes = frozenset({ATTR_HOURLY_DATA, ATTR_DETAIL})
 
     def __init__(
         self,
@@ -74,53 +200,289 @@ class PVForecastSensor(CoordinatorEntity, SensorEntity):
         days_ahead: int,
         period_name: str,
         entry_id: str,
+        attribute_mode: str = ATTRIBUTE_MODE_FULL,
     ) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
         self._period_id = period_id
         self._days_ahead = days_ahead
         self._entry_id = entry_id
+        self._attribute_mode = attribute_mode
         self._attr_unique_id = f"{entry_id}_{period_id}"
         self._attr_name = f"PV Forecast NED.nl {period_name}"
+        self._written: tuple[Any, ...] | None = None
 
     @property
     def native_value(self) -> StateType:
         """Return the state of the sensor."""
-        if not self.coordinator.data or "hydra:member" not in self.coordinator.data:
+        day = self.coordinator.forecast.get(self._target_date)
+        if day is None:
             return None
 
-        # Calculate the date we're looking for
-        target_date = datetime.now().date() + timedelta(days=self._days_ahead)
-        daily_total = 0.0
-
-        # Sum up all values for the target date
-        for entry in self.coordinator.data["hydra:member"]:
-            entry_date = datetime.fromisoformat(entry["validfrom"]).date()
-            if entry_date == target_date:
-                daily_total += float(entry["volume"])
-
-        return daily_total if daily_total > 0 else None
+        return day.total if day.total > 0 else None
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return the state attributes."""
-        target_date = datetime.now().date() + timedelta(days=self._days_ahead)
-        entries = []
-
-        if self.coordinator.data and "hydra:member" in self.coordinator.data:
-            for entry in self.coordinator.data["hydra:member"]:
-                entry_date = datetime.fromisoformat(entry["validfrom"]).date()
-                if entry_date == target_date:
-                    entries.append(
-                        {
-                            "valid_from": entry["validfrom"],
-                            "valid_to": entry["validto"],
-                            "volume": entry["volume"],
-                        }
-                    )
+        target_date = self._target_date
+        day = self.coordinator.forecast.get(target_date)
 
-        return {
+        attributes: dict[str, Any] = {
             "forecast_date": target_date.isoformat(),
             "period_name": FORECAST_PERIODS[self._period_id]["name"],
-            "hourly_data": entries,
         }
+        if self._attribute_mode == ATTRIBUTE_MODE_FULL:
+            attributes[ATTR_HOURLY_DATA] = day.entries if day else []
+        elif self._attribute_mode == ATTRIBUTE_MODE_COMPACT:
+            attributes[ATTR_DETAIL] = day.compact if day else {"values": []}
+
+        return attributes
+
+    async def async_get_detail(self, forecast_date: date | None = None) -> ServiceResponse:
+        """Return the full forecast detail for this sensor's day, or a given date."""
+        target_date = forecast_date or self._target_date
+
+        return {
+            ATTR_FORECAST_DATE: target_date.isoformat(),
+            ATTR_HOURLY_DATA: await self.coordinator.async_get_day_entries(target_date),
+        }
+
+    async def async_added_to_hass(self) -> None:
+        """Remember the state written when the sensor is added."""
+        await super().async_added_to_hass()
+        self._written = self._signature()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when this sensor's day actually changed.
+
+        A refresh usually changes some days of the forecast but not others,
+        so unchanged sensors skip the state_changed event and recorder row.
+        """
+        if (signature := self._signature()) == self._written:
+            return
+        self._written = signature
+        super()._handle_coordinator_update()
+
+    def _signature(self) -> tuple[Any, ...]:
+        """Return what the state and attributes of this sensor depend on."""
+        target_date = self._target_date
+        day = self.coordinator.forecast.get(target_date)
+        if self._attribute_mode == ATTRIBUTE_MODE_NONE or day is None:
+            return (self.available, target_date, day and day.total)
+        # Day buckets compare by total and entries
+        return (self.available, target_date, day)
+
+    @property
+    def _target_date(self) -> date:
+        """Return the date this sensor forecasts."""
+        return dt_util.now().date() + timedelta(days=self._days_ahead)
+
+
+class PVForecastIntervalSensor(CoordinatorEntity, SensorEntity):
+    """PV Forecast NED.nl sensor for the current moment.
+
+    The state is looked up in the already fetched series and rewritten at
+    each interval boundary, without polling the API.
+    """
+
+    def __init__(
+        self,
+        coordinator: PVForecastDataUpdateCoordinator,
+        *,  # Force remaining arguments to be keyword-only
+        sensor_id: str,
+        sensor_name: str,
+        entry_id: str,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._sensor_id = sensor_id
+        self._unsub_boundary: CALLBACK_TYPE | None = None
+        self._attr_unique_id = f"{entry_id}_{sensor_id}"
+        self._attr_name = f"PV Forecast NED.nl {sensor_name}"
+        if sensor_id == "peak_time":
+            self._attr_device_class = SensorDeviceClass.TIMESTAMP
+        else:
+            self._attr_device_class = SensorDeviceClass.ENERGY
+            self._attr_native_unit_of_measurement = "kWh"
+
+    @property
+    def native_value(self) -> StateType | datetime:
+        """Return the state of the sensor."""
+        forecast = self.coordinator.forecast
+        now = dt_util.utcnow()
+
+        if self._sensor_id in ("current_interval", "next_interval"):
+            if (interval := self._interval(now)) is None:
+                return None
+            return interval.volume
+
+        today = dt_util.start_of_local_day()
+        tomorrow = dt_util.start_of_local_day(today + timedelta(days=1))
+        if self._sensor_id == "remaining_today":
+            return forecast.remaining(now, tomorrow)
+
+        if (peak := forecast.peak(today, tomorrow)) is None or peak.volume <= 0:
+            return None
+        return peak.start
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the state attributes."""
+        if self._sensor_id not in ("current_interval", "next_interval"):
+            return None
+        if (interval := self._interval(dt_util.utcnow())) is None:
+            return None
+        return {
+            "valid_from": dt_util.as_local(interval.start).isoformat(),
+            "valid_to": dt_util.as_local(interval.end).isoformat(),
+        }
+
+    def _interval(self, now: datetime) -> ForecastInterval | None:
+        """Return the interval this sensor reports on."""
+        if self._sensor_id == "current_interval":
+            return self.coordinator.forecast.interval_at(now)
+        return self.coordinator.forecast.next_interval(now)
+
+    async def async_added_to_hass(self) -> None:
+        """Start updating at interval boundaries."""
+        await super().async_added_to_hass()
+        self._schedule_boundary()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop updating at interval boundaries."""
+        await super().async_will_remove_from_hass()
+        if self._unsub_boundary is not None:
+            self._unsub_boundary()
+            self._unsub_boundary = None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        self._schedule_boundary()
+        super()._handle_coordinator_update()
+
+    @callback
+    def _schedule_boundary(self) -> None:
+        """Schedule a state update at the next interval boundary."""
+        if self._unsub_boundary is not None:
+            self._unsub_boundary()
+            self._unsub_boundary = None
+
+        boundary = self.coordinator.forecast.next_boundary(dt_util.utcnow())
+        if boundary is not None:
+            self._unsub_boundary = async_track_point_in_utc_time(
+                self.hass, self._handle_boundary, boundary
+            )
+
+    @callback
+    def _handle_boundary(self, _now: datetime) -> None:
+        """Update the state when an interval starts or ends."""
+        self._unsub_boundary = None
+        self._schedule_boundary()
+        self.async_write_ha_state()
+
+    async def async_get_detail(self, forecast_date: date | None = None) -> ServiceResponse:
+        """Return the full forecast detail for today, or a given date."""
+        target_date = forecast_date or dt_util.now().date()
+
+        return {
+            ATTR_FORECAST_DATE: target_date.isoformat(),
+            ATTR_HOURLY_DATA: await self.coordinator.async_get_day_entries(target_date),
+        }
+
+
+class PVForecastDiagnosticSensor(CoordinatorEntity, SensorEntity):
+    """PV Forecast NED.nl sensor for a statistic of the last refresh."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: PVForecastDataUpdateCoordinator,
+        *,  # Force remaining arguments to be keyword-only
+        sensor_id: str,
+        sensor_info: dict[str, Any],
+        entry_id: str,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._sensor_id = sensor_id
+        self._scale = sensor_info.get("scale", 1)
+        self._entry_id = entry_id
+        self._attr_unique_id = f"{entry_id}_{sensor_id}"
+        self._attr_name = f"PV Forecast NED.nl {sensor_info['name']}"
+        self._attr_native_unit_of_measurement = sensor_info.get("unit")
+        self._attr_device_class = sensor_info.get("device_class")
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the state of the sensor."""
+        if self.coordinator.stats.finished is None:
+            return None
+        value = getattr(self.coordinator.stats, self._sensor_id)
+        if isinstance(value, float):
+            return round(value * self._scale, 1)
+        return value
+
+    async def async_added_to_hass(self) -> None:
+        """Update whenever a refresh finishes, even if the forecast did not change."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, stats_signal(self._entry_id), self.async_write_ha_state
+            )
+        )
+
+
+class PVForecastAccuracySensor(CoordinatorEntity, SensorEntity):
+    """PV Forecast NED.nl sensor for the error of forecasts some days ahead.
+
+    The state is the mean absolute error of the daily totals over the
+    accuracy window; the bias is positive when forecasts were too high.
+    """
+
+    _attr_native_unit_of_measurement = "kWh"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: PVForecastDataUpdateCoordinator,
+        *,  # Force remaining arguments to be keyword-only
+        period_id: str,
+        days_ahead: int,
+        period_name: str,
+        entry_id: str,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._days_ahead = days_ahead
+        self._entry_id = entry_id
+        self._attr_unique_id = f"{entry_id}_accuracy_{period_id}"
+        self._attr_name = f"PV Forecast NED.nl Error {period_name}"
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the state of the sensor."""
+        stats = self.coordinator.accuracy.stats(self._days_ahead)
+        return round(stats.mae, 1) if stats else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the state attributes."""
+        stats = self.coordinator.accuracy.stats(self._days_ahead)
+        return {
+            "bias": round(stats.bias, 1) if stats else None,
+            "samples": stats.samples if stats else 0,
+            "window": self.coordinator.accuracy.window,
+        }
+
+    async def async_added_to_hass(self) -> None:
+        """Update whenever a refresh finishes, as actuals may have come in."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, stats_signal(self._entry_id), self.async_write_ha_state
+            )
+        )
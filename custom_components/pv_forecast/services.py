@@ -0,0 +1,114 @@
+"""Service actions for PV Forecast NED.nl."""
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from datetime import timedelta
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, GRANULARITY_DURATION, GRANULARITY_OPTIONS, PROVINCE_MAPPING
+from .coordinator import PVForecastDataUpdateCoordinator
+
+SERVICE_GET_FORECAST = "get_forecast"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_GRANULARITY = "granularity"
+ATTR_PROVINCES = "provinces"
+
+GET_FORECAST_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+        vol.Optional(ATTR_GRANULARITY): vol.In(GRANULARITY_OPTIONS),
+        vol.Optional(ATTR_PROVINCES): vol.All(
+            cv.ensure_list, [vol.In(list(PROVINCE_MAPPING))]
+        ),
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the service actions of the integration."""
+
+    async def async_get_forecast(call: ServiceCall) -> ServiceResponse:
+        """Return the forecast of a time range for configured provinces."""
+        return get_forecast(hass.data.get(DOMAIN, {}).values(), call.data)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_FORECAST,
+        async_get_forecast,
+        schema=GET_FORECAST_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+def get_forecast(
+    coordinators: Iterable[PVForecastDataUpdateCoordinator], data: Mapping[str, Any]
+) -> ServiceResponse:
+    """Answer a get_forecast call from the coordinators' forecast indexes.
+
+    Each province is served by the entry with the finest granularity that
+    can be summed to the requested one. Without a granularity, that
+    entry's own granularity is used.
+    """
+    start = dt_util.as_utc(data.get(ATTR_START) or dt_util.start_of_local_day())
+    end = dt_util.as_utc(data.get(ATTR_END) or start + timedelta(days=1))
+    if end <= start:
+        raise ServiceValidationError("The end of the range must be after its start")
+
+    by_province: dict[str, list[PVForecastDataUpdateCoordinator]] = {}
+    for coordinator in coordinators:
+        by_province.setdefault(coordinator.province, []).append(coordinator)
+    provinces = data.get(ATTR_PROVINCES) or sorted(by_province)
+    if missing := [province for province in provinces if province not in by_province]:
+        raise ServiceValidationError(f"No forecast configured for {', '.join(missing)}")
+
+    granularity = data.get(ATTR_GRANULARITY)
+    forecasts = {}
+    for province in provinces:
+        coordinator = _finest(by_province[province], granularity)
+        if coordinator is None:
+            raise ServiceValidationError(
+                f"No forecast for {province} can be summed to {granularity}"
+            )
+        step = None
+        if granularity is not None and granularity != coordinator.granularity:
+            step = int(GRANULARITY_DURATION[granularity].total_seconds())
+        forecasts[province] = {
+            ATTR_GRANULARITY: granularity or coordinator.granularity,
+            "forecast": coordinator.forecast.entries_between(start, end, step),
+        }
+
+    return {ATTR_START: start.isoformat(), ATTR_END: end.isoformat(), "provinces": forecasts}
+
+
+def _finest(
+    coordinators: list[PVForecastDataUpdateCoordinator], granularity: str | None
+) -> PVForecastDataUpdateCoordinator | None:
+    """Return the coordinator that can serve a granularity in most detail."""
+    if granularity is not None:
+        seconds = GRANULARITY_DURATION[granularity].total_seconds()
+        coordinators = [
+            coordinator
+            for coordinator in coordinators
+            if seconds % GRANULARITY_DURATION[coordinator.granularity].total_seconds() == 0
+        ]
+    return min(
+        coordinators,
+        key=lambda coordinator: GRANULARITY_DURATION[coordinator.granularity],
+        default=None,
+    )
@@ -0,0 +1,150 @@
+"""Local SQLite store for NED.nl utilization series.
+
+This module only uses the standard library and no relative imports, so the
+command line tool in ``src/main.py`` can use it as well. A store may be
+used from several threads; access to its connection is serialized.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime, timezone
+import sqlite3
+import threading
+import time
+from typing import Any, NamedTuple
+
+# Length of an interval in seconds per API granularity
+GRANULARITY_SECONDS = {3: 600, 4: 900, 5: 3600, 6: 86400}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS utilizations (
+    point INTEGER NOT NULL,
+    type INTEGER NOT NULL,
+    classification INTEGER NOT NULL,
+    granularity INTEGER NOT NULL,
+    validfrom INTEGER NOT NULL,
+    validto INTEGER NOT NULL,
+    volume REAL,
+    fetched INTEGER NOT NULL,
+    PRIMARY KEY (point, type, classification, granularity, validfrom)
+) WITHOUT ROWID
+"""
+
+
+class SeriesKey(NamedTuple):
+    """Identifies a utilization series."""
+
+    point: int
+    type: int
+    classification: int
+    granularity: int
+
+
+class ForecastStore:
+    """Utilization entries indexed on series and start time."""
+
+    def __init__(self, path: str) -> None:
+        """Open (and if needed create) the store."""
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(_SCHEMA)
+
+    def upsert(self, key: SeriesKey, members: Iterable[dict[str, Any]]) -> int:
+        """Insert or replace API entries of a series; return the number written."""
+        fetched = int(time.time())
+        rows = [
+            (
+                *key,
+                _timestamp(member["validfrom"]),
+                _timestamp(member["validto"]),
+                float(member["volume"]),
+                fetched,
+            )
+            for member in members
+        ]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT INTO utilizations VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT DO UPDATE SET validto = excluded.validto, "
+                "volume = excluded.volume, fetched = excluded.fetched",
+                rows,
+            )
+        return len(rows)
+
+    def query(
+        self, key: SeriesKey, start: datetime, end: datetime
+    ) -> list[dict[str, Any]]:
+        """Return the entries starting in [start, end) as API entries."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT validfrom, validto, volume FROM utilizations "
+                "WHERE point = ? AND type = ? AND classification = ? "
+                "AND granularity = ? AND validfrom >= ? AND validfrom < ? "
+                "ORDER BY validfrom",
+                (*key, _epoch(start), _epoch(end)),
+            ).fetchall()
+        return [
+            {
+                "validfrom": _isoformat(validfrom),
+                "validto": _isoformat(validto),
+                "volume": volume,
+            }
+            for validfrom, validto, volume in rows
+        ]
+
+    def covers(
+        self,
+        key: SeriesKey,
+        start: datetime,
+        end: datetime,
+        max_age: float | None = None,
+    ) -> bool:
+        """Return whether every interval in [start, end) is stored.
+
+        With max_age, only entries fetched at most that many seconds ago
+        count.
+        """
+        step = GRANULARITY_SECONDS[key.granularity]
+        first = -(-_epoch(start) // step) * step
+        expected = len(range(first, _epoch(end), step))
+        fetched_after = time.time() - max_age if max_age is not None else 0
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM utilizations "
+                "WHERE point = ? AND type = ? AND classification = ? "
+                "AND granularity = ? AND validfrom >= ? AND validfrom < ? "
+                "AND fetched >= ?",
+                (*key, _epoch(start), _epoch(end), fetched_after),
+            ).fetchone()
+        return count >= expected
+
+    def close(self) -> None:
+        """Close the store."""
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> ForecastStore:
+        """Return the store for use in a with statement."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the store at the end of a with statement."""
+        self.close()
+
+
+def _timestamp(value: str) -> int:
+    """Return the Unix timestamp of an API date."""
+    return _epoch(datetime.fromisoformat(value))
+
+
+def _epoch(moment: datetime) -> int:
+    """Return the Unix timestamp of a moment; naive moments are UTC."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+def _isoformat(timestamp: int) -> str:
+    """Return a UTC ISO 8601 string for a Unix timestamp."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
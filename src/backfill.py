@@ -0,0 +1,104 @@
+"""Resumable historical backfill for the PV forecast command line tool.
+
+A date range is split into API-sized chunks per province. Chunks are
+fetched in parallel, written to the local SQLite store as they complete
+and recorded in a checkpoint file, so an interrupted run picks up where it
+left off.
+"""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+from timeseries import ForecastStore
+
+# Number of days fetched per request (168 hourly entries fit on one page)
+DEFAULT_CHUNK_DAYS = 7
+# Maximum number of chunks fetched at the same time
+MAX_CONCURRENT_CHUNKS = 4
+
+
+def split_range(start_date, end_date, chunk_days=DEFAULT_CHUNK_DAYS):
+    """Split [start_date, end_date) into chunks of at most chunk_days days."""
+    chunks = []
+    chunk_start = start_date
+    while chunk_start < end_date:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days), end_date)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end
+    return chunks
+
+
+class Checkpoint:
+    """Completed chunks, kept as one line per chunk in a text file."""
+
+    def __init__(self, path):
+        """Load the chunks completed by earlier runs."""
+        self._path = path
+        self._done = set()
+        try:
+            with open(path, encoding="utf-8") as file:
+                self._done = {line.strip() for line in file if line.strip()}
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def key(province, chunk_start, chunk_end):
+        """Return the checkpoint line for a chunk."""
+        return f"{province} {chunk_start:%Y-%m-%d} {chunk_end:%Y-%m-%d}"
+
+    def __contains__(self, key):
+        """Return whether a chunk was completed."""
+        return key in self._done
+
+    def mark_done(self, key):
+        """Record a chunk as completed."""
+        with open(self._path, "a", encoding="utf-8") as file:
+            file.write(key + "\n")
+        self._done.add(key)
+
+
+def _pending_chunks(checkpoint, provinces, date_chunks):
+    """Return the (province, start, end) chunks not completed yet."""
+    return [
+        (province, chunk_start, chunk_end)
+        for province in provinces
+        for chunk_start, chunk_end in date_chunks
+        if Checkpoint.key(province, chunk_start, chunk_end) not in checkpoint
+    ]
+
+
+def _fetch_chunks(fetch, chunks):
+    """Fetch chunks in parallel, yielding (chunk, data) as each one finishes."""
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_CHUNKS) as executor:
+        futures = {executor.submit(fetch, *chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def run_backfill(
+    fetch, series_key, provinces, start_date, end_date, store_path, chunk_days=DEFAULT_CHUNK_DAYS
+):
+    """Backfill the forecasts of provinces between two dates into a store.
+
+    fetch(province, chunk_start, chunk_end) returns the API data of a chunk,
+    or None on failure, and series_key(province) the store key of its
+    series. Completed chunks are skipped on later runs. Returns the number
+    of chunks that failed.
+    """
+    checkpoint = Checkpoint(f"{store_path}.checkpoint")
+    chunks = _pending_chunks(checkpoint, provinces, split_range(start_date, end_date, chunk_days))
+    print(f"Backfilling {len(chunks)} chunk(s) into {store_path}", file=sys.stderr)
+
+    failed = 0
+    with ForecastStore(store_path) as store:
+        for done, (chunk, data) in enumerate(_fetch_chunks(fetch, chunks), start=1):
+            if data is None:
+                failed += 1
+                continue
+            # Write the data before marking the chunk as done
+            store.upsert(series_key(chunk[0]), data.get("hydra:member", []))
+            checkpoint.mark_done(Checkpoint.key(*chunk))
+            print(f"[{done}/{len(chunks)}] {Checkpoint.key(*chunk)}", file=sys.stderr)
+
+    return failed
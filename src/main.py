@@ -1,13 +1,47 @@
 """A script to fetch photovoltaic generation forecasts using the ned.nl API."""
 
 # Import necessary libraries
+import argparse
+import os
 import sys
-from datetime import datetime, timedelta
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
 import requests
+from requests.adapters import HTTPAdapter
+
+# Reuse the dependency-free helpers that ship with the Home Assistant integration
+sys.path.append(str(Path(__file__).resolve().parent.parent / "custom_components" / "pv_forecast"))
+# pylint: disable=wrong-import-position
+from ratelimit import (
+    MAX_RETRIES,
+    RETRY_STATUSES,
+    TokenBucket,
+    backoff_delay,
+    retry_after_seconds,
+)
+from timeseries import ForecastStore, SeriesKey
+from output import OUTPUT_FORMATS, open_writer
+from backfill import DEFAULT_CHUNK_DAYS, run_backfill
+# pylint: enable=wrong-import-position
 
 # API_KEY is now passed as a command-line argument
 # Define the base URL for the NED.nl API utilizations endpoint
-API_URL = "https://api.ned.nl/v1/utilizations"
+# (NED_API_URL points it at a local stand-in such as tests/fake_ned.py)
+API_URL = os.environ.get("NED_API_URL", "https://api.ned.nl/v1/utilizations")
+# Number of entries requested per API page
+DEFAULT_PAGE_SIZE = 200
+# Maximum number of pages fetched at the same time
+MAX_CONCURRENT_PAGES = 4
+# Rate limiter shared by all requests made by this process
+RATE_LIMITER = TokenBucket()
+# SQLite file used by --backfill and --export when no --store is given
+DEFAULT_STORE = "pv_forecast.db"
+# Seconds a stored forecast is served instead of fetching it again
+DEFAULT_MAX_AGE = 3600
 
 # Mapping of province names to point IDs (based on API documentation)
 PROVINCE_POINT_MAPPING = {
@@ -27,14 +61,20 @@ PROVINCE_POINT_MAPPING = {
 }
 
 # Define a function to fetch the PV forecast
-def get_pv_forecast(province_name, api_key, start_date, end_date):
-    """Fetch the photovoltaic generation forecast for a specific province within a date range."""
+def get_pv_forecast(province_name, api_key, start_date, end_date, page_size=DEFAULT_PAGE_SIZE, session=None, timing=False):
+    """Fetch the photovoltaic generation forecast for a specific province within a date range.
+
+    All result pages are fetched (concurrently where the page count is known)
+    and merged into a single series ordered by 'validfrom'. Pass a session to
+    share pooled connections between calls. With timing, the time taken,
+    pages, bytes and entries are printed to stderr.
+    """
     # Get the point ID for the given province name from the mapping
     point_id = PROVINCE_POINT_MAPPING.get(province_name)
     # Check if the province name is valid (found in the mapping)
     if point_id is None:
         # Print an error message if the province is not found
-        print(f"Error: Province '{province_name}' not found in mapping.")
+        print(f"Error: Province '{province_name}' not found in mapping.", file=sys.stderr)
         # Return None to indicate an error
         return None
 
@@ -53,24 +93,169 @@ def get_pv_forecast(province_name, api_key, start_date, end_date):
         "activity": 1, # Activity type (1 for Providing - generation)
         "validfrom[after]": start_date.strftime('%Y-%m-%d'), # Start date (inclusive)
         "validfrom[strictly_before]": end_date.strftime('%Y-%m-%d'), # End date (exclusive)
+        "itemsPerPage": page_size, # Number of entries per result page
     }
 
     # Use a try-except block to handle potential request errors
+    started = time.perf_counter()
     try:
-        # Send a GET request to the API with the defined headers and parameters
-        # Added timeout to prevent hanging
-        response = requests.get(API_URL, headers=headers, params=params, timeout=30)
-        # Raise an HTTPError for bad responses (4xx or 5xx)
-        response.raise_for_status()  # Raise an error for bad responses
-        # Parse the JSON response and return it
-        return response.json()  # Return the JSON response
+        # Reuse one session so all pages share pooled connections
+        with (requests.Session() if session is None else nullcontext(session)) as http:
+            pages = _get_all_pages(http, headers, params)
     # Catch any request exceptions
     except requests.exceptions.RequestException as e:
         # Print an error message including the exception details
-        print(f"Error fetching data from ned.nl API: {e}")
+        print(f"Error fetching data from ned.nl API for {province_name}: {e}", file=sys.stderr)
         # Return None to indicate an error
         return None
 
+    # Merge all pages into a single series ordered by start time
+    members = [entry for page, _ in pages for entry in page.get("hydra:member", [])]
+    members.sort(key=lambda entry: entry["validfrom"])
+    if timing:
+        # Report how long the fetch took and how much was transferred
+        print(
+            f"{province_name}: {time.perf_counter() - started:.2f} s, {len(pages)} page(s), "
+            f"{sum(size for _, size in pages)} bytes, {len(members)} entries",
+            file=sys.stderr,
+        )
+    return {"hydra:member": members, "hydra:totalItems": len(members)}
+
+def _get_all_pages(session, headers, params):
+    """Fetch every result page of a query as (data, size in bytes) pairs."""
+    # Fetch the first page, which tells us how many pages there are
+    pages = [_get_page(session, headers, params, 1)]
+    last_page = _last_page(pages[0][0])
+    if last_page is not None and last_page > 1:
+        # Fetch the remaining pages concurrently
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_PAGES) as executor:
+            pages += executor.map(
+                lambda page: _get_page(session, headers, params, page),
+                range(2, last_page + 1),
+            )
+    elif last_page is None:
+        # Only a next link is available, so follow the pages one by one
+        while (next_page := _page_number(_view(pages[-1][0]).get("hydra:next"))) is not None:
+            pages.append(_get_page(session, headers, params, next_page))
+    return pages
+
+def _get_page(session, headers, params, page):
+    """Fetch a single result page from the API, with its size in bytes.
+
+    Requests wait for the rate limiter and are retried on 429 and 5xx
+    responses, honouring Retry-After or backing off exponentially.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        # Wait for our turn so we stay within the API request quota
+        time.sleep(RATE_LIMITER.reserve())
+        # Added timeout to prevent hanging
+        response = session.get(API_URL, headers=headers, params={**params, "page": page}, timeout=30)
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            break
+        # Back off before retrying, and hold back the other requests as well
+        delay = retry_after_seconds(response.headers.get("Retry-After"))
+        RATE_LIMITER.pause(delay if delay is not None else backoff_delay(attempt))
+    # Raise an HTTPError for bad responses (4xx or 5xx)
+    response.raise_for_status()
+    # Parse the JSON response and return it with its size
+    return response.json(), len(response.content)
+
+def _view(data):
+    """Return the hydra:view block (pagination links) of a response."""
+    return data.get("hydra:view") or {}
+
+def _page_number(url):
+    """Return the page number from a hydra page link, or None."""
+    if not url:
+        return None
+    page = parse_qs(urlsplit(url).query).get("page")
+    return int(page[0]) if page else None
+
+def _last_page(data):
+    """Return the number of result pages, or None if it cannot be determined."""
+    view = _view(data)
+    last = _page_number(view.get("hydra:last"))
+    if last is not None:
+        return last
+    if "hydra:next" not in view:
+        return 1
+    # The server may cap the page size, so go by what it actually returned
+    per_page = len(data.get("hydra:member", []))
+    total = data.get("hydra:totalItems")
+    if total is not None and per_page:
+        return -(-int(total) // per_page)
+    return None
+
+# Define a function to fetch several provinces at once
+def fetch_provinces(province_names, api_key, start_date, end_date, page_size=DEFAULT_PAGE_SIZE, timing=False):
+    """Fetch the forecasts of several provinces concurrently.
+
+    Yields (province_name, data) pairs in the order the provinces finish, so
+    results can be written out while the others are still being fetched.
+    Provinces that fail are reported on stderr and skipped.
+    """
+    with requests.Session() as session:
+        # Size the connection pool for all provinces and their pages
+        pool_size = len(province_names) * MAX_CONCURRENT_PAGES
+        session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        with ThreadPoolExecutor(max_workers=len(province_names)) as executor:
+            futures = {
+                executor.submit(
+                    get_pv_forecast, name, api_key, start_date, end_date, page_size, session, timing
+                ): name
+                for name in province_names
+            }
+            for future in as_completed(futures):
+                data = future.result()
+                if data is not None:
+                    yield futures[future], data
+
+# Define a function to get the key of a province's series in the local store
+def series_key(province_name):
+    """Return the local store key of a province's hourly solar forecast."""
+    return SeriesKey(PROVINCE_POINT_MAPPING[province_name], 2, 1, 5)
+
+def _utc_day(moment):
+    """Return the start of a moment's date in UTC, as the API filters on."""
+    return datetime(moment.year, moment.month, moment.day, tzinfo=timezone.utc)
+
+# Define a function to answer a query from the local store
+def load_stored_forecast(store, province_name, start_date, end_date, max_age=None):
+    """Return a province's forecast from the local store, like get_pv_forecast.
+
+    Returns None unless every hour of the date range is stored and, with
+    max_age, was fetched at most max_age seconds ago.
+    """
+    key = series_key(province_name)
+    start, end = _utc_day(start_date), _utc_day(end_date)
+    if not store.covers(key, start, end, max_age):
+        return None
+    members = store.query(key, start, end)
+    return {"hydra:member": members, "hydra:totalItems": len(members)}
+
+# Define a function to get forecasts from the local store or the API
+def get_forecasts(province_names, api_key, start_date, end_date, page_size=DEFAULT_PAGE_SIZE, store=None, max_age=DEFAULT_MAX_AGE, timing=False):
+    """Yield (province_name, data) pairs like fetch_provinces.
+
+    With a store, provinces that are freshly stored are answered locally and
+    the others are fetched and written to the store.
+    """
+    missing = []
+    for name in province_names:
+        data = load_stored_forecast(store, name, start_date, end_date, max_age) if store else None
+        if data is None:
+            missing.append(name)
+        else:
+            if timing:
+                print(f"{name}: answered from the local store", file=sys.stderr)
+            yield name, data
+    if not missing:
+        return
+    for name, data in fetch_provinces(missing, api_key, start_date, end_date, page_size, timing):
+        if store:
+            store.upsert(series_key(name), data["hydra:member"])
+        yield name, data
+
 # Define a function to process the fetched forecast data
 def process_forecast_data(data):
     """Process the forecast data and extract relevant information."""
@@ -103,50 +288,175 @@ def process_forecast_data(data):
         # Print a message for invalid or empty data received
         print("Invalid or empty forecast data received.")
 
+# Define a function to turn the province argument into a list of names
+def parse_provinces(value):
+    """Return the province names from a name, a comma-separated list, or 'all'."""
+    if value.strip().lower() == "all":
+        return list(PROVINCE_POINT_MAPPING)
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in PROVINCE_POINT_MAPPING]
+    if unknown or not names:
+        raise argparse.ArgumentTypeError(
+            f"unknown province(s): {', '.join(unknown) or value!r}; "
+            f"choose from {', '.join(PROVINCE_POINT_MAPPING)} or 'all'"
+        )
+    return names
+
+def _days_to_forecast(value):
+    """Validate the number of days to forecast (1-7)."""
+    try:
+        days = int(value)
+    except ValueError as err:
+        raise argparse.ArgumentTypeError("must be an integer") from err
+    if not 1 <= days <= 7:
+        raise argparse.ArgumentTypeError("must be between 1 and 7")
+    return days
+
+def _date(value):
+    """Parse a YYYY-MM-DD date."""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError as err:
+        raise argparse.ArgumentTypeError("must be a date as YYYY-MM-DD") from err
+
+def _positive_int(value):
+    """Validate a positive integer, like a page size or a number of days."""
+    try:
+        number = int(value)
+    except ValueError as err:
+        raise argparse.ArgumentTypeError("must be an integer") from err
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be a positive integer")
+    return number
+
+# Define a function to build the command-line argument parser
+def build_parser():
+    """Return the argument parser for the command-line tool."""
+    parser = argparse.ArgumentParser(
+        description="Fetch photovoltaic generation forecasts from the ned.nl API.",
+    )
+    parser.add_argument("api_key", help="your ned.nl API key")
+    parser.add_argument(
+        "provinces",
+        metavar="province_name",
+        type=parse_provinces,
+        help="a province name, a comma-separated list of names, or 'all'",
+    )
+    parser.add_argument(
+        "days_to_forecast", nargs="?", type=_days_to_forecast, default=7,
+        help="number of days to forecast, 1-7 (default: 7)",
+    )
+    parser.add_argument(
+        "page_size", nargs="?", type=_positive_int, default=DEFAULT_PAGE_SIZE,
+        help=f"entries per API page (default: {DEFAULT_PAGE_SIZE})",
+    )
+    parser.add_argument(
+        "--format", dest="output_format", choices=OUTPUT_FORMATS, default="text",
+        help="output format (default: text); parquet requires pyarrow",
+    )
+    parser.add_argument("--output", help="write to this file instead of stdout")
+    parser.add_argument(
+        "--backfill", nargs=2, type=_date, metavar=("START", "END"),
+        help="fetch the history from START up to END (YYYY-MM-DD) into --store instead",
+    )
+    parser.add_argument(
+        "--export", nargs=2, type=_date, metavar=("START", "END"),
+        help="write the stored history from START up to END (YYYY-MM-DD) without calling the API",
+    )
+    parser.add_argument(
+        "--store",
+        help="SQLite file that answers repeated queries locally; "
+        f"--backfill and --export default to {DEFAULT_STORE}",
+    )
+    parser.add_argument(
+        "--max-age", type=_positive_int, default=DEFAULT_MAX_AGE,
+        help="seconds a stored forecast is used before fetching it again (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--timing", action="store_true",
+        help="print the time taken, pages, bytes and entries of every fetch to stderr",
+    )
+    parser.add_argument(
+        "--chunk-days", type=_positive_int, default=DEFAULT_CHUNK_DAYS,
+        help="days fetched per backfill request (default: %(default)s)",
+    )
+    return parser
+
 # Define the main function to run the script
 def main():
     """Main function to parse arguments and fetch/process PV forecast."""
-    # Check if the correct number of command-line arguments is provided
-    # (at least 2 required)
-    if len(sys.argv) < 3:
-        if len(sys.argv) == 1:
-            print("Error: API key and province name are missing.")
-        elif len(sys.argv) == 2:
-            print("Error: Province name is missing.")
-        # Print usage instructions
-        print("Usage: python main.py <api_key> <province_name> [days_to_forecast]")
-        # Exit the script with an error code
-        sys.exit(1)
-
-    # Get the API key from the first command-line argument
-    api_key = sys.argv[1]
-    # Get the province name from the second command-line argument
-    province = sys.argv[2]
-
-    # Determine the number of days to forecast
-    days_to_forecast = 7 # Default to 7 days
-    if len(sys.argv) > 3:
+    args = build_parser().parse_args()
+    started = time.perf_counter()
+    try:
+        run(args)
+    finally:
+        if args.timing:
+            # Report the total run time, also when the run failed
+            print(f"Total: {time.perf_counter() - started:.2f} s", file=sys.stderr)
+
+# Define the function that carries out the parsed command
+def run(args):
+    """Fetch, backfill or export forecasts as the parsed arguments ask."""
+    # Backfill a date range into the local store, resuming earlier runs
+    if args.backfill:
+        start_date, end_date = args.backfill
+        with requests.Session() as session:
+            session.mount("https://", HTTPAdapter(pool_maxsize=MAX_CONCURRENT_PAGES * 4))
+            failed = run_backfill(
+                lambda province, chunk_start, chunk_end: get_pv_forecast(
+                    province, args.api_key, chunk_start, chunk_end, args.page_size, session,
+                    args.timing,
+                ),
+                series_key, args.provinces, start_date, end_date,
+                args.store or DEFAULT_STORE, args.chunk_days,
+            )
+        if failed:
+            print(f"Error: {failed} chunk(s) failed; run again to retry them.", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    # Export stored history without calling the API
+    if args.export:
+        start_date, end_date = args.export
         try:
-            # Attempt to convert the third argument to an integer
-            days_to_forecast = int(sys.argv[3])
-            # Validate that the number of days is between 1 and 7
-            if not 1 <= days_to_forecast <= 7:
-                print("Error: Number of days to forecast must be between 1 and 7.")
-                print("Usage: python main.py <api_key> <province_name> [days_to_forecast]")
-                sys.exit(1)
-        except ValueError:
-            print("Error: Invalid value for days to forecast. Please provide an integer.")
-            print("Usage: python main.py <api_key> <province_name> [days_to_forecast]")
+            with ForecastStore(args.store or DEFAULT_STORE) as store, \
+                    open_writer(args.output_format, args.output) as writer:
+                for province in args.provinces:
+                    key = series_key(province)
+                    members = store.query(key, _utc_day(start_date), _utc_day(end_date))
+                    writer.write(province, {"hydra:member": members})
+        except (OSError, RuntimeError) as err:
+            print(f"Error: {err}", file=sys.stderr)
             sys.exit(1)
+        return
 
     # Calculate the date range based on the determined number of days
     start_date = datetime.now()
-    end_date = start_date + timedelta(days=days_to_forecast)
+    end_date = start_date + timedelta(days=args.days_to_forecast)
 
-    # Call the get_pv_forecast function to fetch the data with the date range
-    forecast_data = get_pv_forecast(province, api_key, start_date, end_date)
-    # Call the process_forecast_data function to process and print the data
-    process_forecast_data(forecast_data)
+    # Answer repeated queries from the local store when one is given
+    with ForecastStore(args.store) if args.store else nullcontext() as store:
+        forecasts = get_forecasts(
+            args.provinces, args.api_key, start_date, end_date, args.page_size,
+            store, args.max_age, args.timing,
+        )
+
+        # A single province printed as text keeps the original output
+        if len(args.provinces) == 1 and args.output_format == "text" and not args.output:
+            # Get the data of the province, or None if it could not be fetched
+            forecast_data = dict(forecasts).get(args.provinces[0])
+            # Call the process_forecast_data function to process and print the data
+            process_forecast_data(forecast_data)
+            return
+
+        # Stream each province out as it arrives
+        try:
+            with open_writer(args.output_format, args.output) as writer:
+                for province, data in forecasts:
+                    writer.write(province, data)
+        except (OSError, RuntimeError) as err:
+            print(f"Error: {err}", file=sys.stderr)
+            sys.exit(1)
 
 # Check if the script is being run directly
 if __name__ == "__main__":
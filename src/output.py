@@ -0,0 +1,150 @@
+"""Output writers for the PV forecast command line tool.
+
+Every writer takes the forecast of one province at a time and writes it
+out straight away, so results stream while other provinces are still
+being fetched.
+"""
+
+import csv
+import json
+import sys
+from contextlib import contextmanager, nullcontext
+
+# Output formats supported by open_writer
+OUTPUT_FORMATS = ["text", "csv", "jsonl", "parquet"]
+# Columns written for every forecast entry
+FIELDS = ["province", "valid_from", "valid_to", "volume"]
+
+
+def _rows(province, data):
+    """Yield a row dict for every forecast entry of a province."""
+    for entry in data.get("hydra:member", []):
+        yield {
+            "province": province,
+            "valid_from": entry.get("validfrom"),
+            "valid_to": entry.get("validto"),
+            "volume": float(entry["volume"]) if entry.get("volume") is not None else None,
+        }
+
+
+class TextWriter:
+    """Write human readable lines, like the single province output."""
+
+    def __init__(self, stream):
+        """Initialize the writer on a text stream."""
+        self._stream = stream
+
+    def write(self, province, data):
+        """Write the forecast of one province."""
+        print(f"PV Forecast Data for {province}:", file=self._stream)
+        for row in _rows(province, data):
+            print(
+                f"From: {row['valid_from']}, To: {row['valid_to']}, Volume: {row['volume']} kWh",
+                file=self._stream,
+            )
+        self._stream.flush()
+
+    def close(self):
+        """Finish writing."""
+        self._stream.flush()
+
+
+class CsvWriter:
+    """Write CSV with a header row."""
+
+    def __init__(self, stream):
+        """Initialize the writer on a text stream."""
+        self._stream = stream
+        self._writer = csv.DictWriter(stream, fieldnames=FIELDS)
+        self._writer.writeheader()
+
+    def write(self, province, data):
+        """Write the forecast of one province."""
+        self._writer.writerows(_rows(province, data))
+        self._stream.flush()
+
+    def close(self):
+        """Finish writing."""
+        self._stream.flush()
+
+
+class JsonLinesWriter:
+    """Write one JSON object per line."""
+
+    def __init__(self, stream):
+        """Initialize the writer on a text stream."""
+        self._stream = stream
+
+    def write(self, province, data):
+        """Write the forecast of one province."""
+        for row in _rows(province, data):
+            self._stream.write(json.dumps(row) + "\n")
+        self._stream.flush()
+
+    def close(self):
+        """Finish writing."""
+        self._stream.flush()
+
+
+class ParquetWriter:
+    """Write Parquet, one row group per province.
+
+    Requires the optional pyarrow package.
+    """
+
+    def __init__(self, stream):
+        """Initialize the writer on a binary stream."""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as err:
+            raise RuntimeError("Parquet output requires the pyarrow package.") from err
+
+        self._pa = pa
+        self._schema = pa.schema(
+            [
+                ("province", pa.string()),
+                ("valid_from", pa.string()),
+                ("valid_to", pa.string()),
+                ("volume", pa.float64()),
+            ]
+        )
+        self._writer = pq.ParquetWriter(stream, self._schema)
+
+    def write(self, province, data):
+        """Write the forecast of one province."""
+        table = self._pa.Table.from_pylist(list(_rows(province, data)), schema=self._schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        """Finish writing the Parquet footer."""
+        self._writer.close()
+
+
+WRITERS = {
+    "text": TextWriter,
+    "csv": CsvWriter,
+    "jsonl": JsonLinesWriter,
+    "parquet": ParquetWriter,
+}
+
+
+@contextmanager
+def open_writer(output_format, path=None):
+    """Open a writer for a format on a file, or on stdout if no path is given."""
+    binary = output_format == "parquet"
+    # pylint: disable=consider-using-with
+    if not path:
+        destination = nullcontext(sys.stdout.buffer if binary else sys.stdout)
+    elif binary:
+        destination = open(path, "wb")
+    else:
+        destination = open(path, "w", encoding="utf-8", newline="")
+    # pylint: enable=consider-using-with
+
+    with destination as stream:
+        writer = WRITERS[output_format](stream)
+        try:
+            yield writer
+        finally:
+            writer.close()
@@ -0,0 +1,173 @@
+"""Benchmarks for the forecast hot paths.
+
+Run them with ``pytest tests/benchmarks``; the README describes how to
+compare a run against a baseline recorded on the same machine.
+"""
+import asyncio
+from datetime import timedelta
+import json
+
+from aiohttp.test_utils import TestServer
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from homeassistant.util.json import json_loads
+import pytest
+
+from custom_components.pv_forecast import api
+from custom_components.pv_forecast.api import MEMBER_FIELDS, _lean_page
+from custom_components.pv_forecast.const import (
+    ATTRIBUTE_MODE_OPTIONS,
+    DATA_RATE_LIMITER,
+    DATA_REQUEST_CACHE,
+    GRANULARITY_DURATION,
+    GRANULARITY_MAPPING,
+    GRANULARITY_OPTIONS,
+    PROVINCE_MAPPING,
+)
+from custom_components.pv_forecast.coordinator import PVForecastDataUpdateCoordinator
+from custom_components.pv_forecast.forecast import ForecastIndex
+from custom_components.pv_forecast.ratelimit import TokenBucket
+from custom_components.pv_forecast.resample import resample
+from custom_components.pv_forecast.sensor import (
+    FORECAST_PERIODS,
+    INTERVAL_SENSORS,
+    PVForecastIntervalSensor,
+    PVForecastSensor,
+)
+from tests.fake_ned import create_app, synthetic_members
+
+pytest.importorskip("pytest_benchmark")
+
+DAYS = 8  # The forecast window plus the extra UTC day fetched around it
+PROVINCE_COUNTS = [1, 4, 12]
+
+
+def make_response(granularity, point=1):
+    """Return a synthetic API response covering the forecast window."""
+    step = GRANULARITY_DURATION[granularity]
+    start = dt_util.start_of_local_day() - timedelta(days=1)
+    members = []
+    moment = start
+    while moment < start + timedelta(days=DAYS):
+        members.append(
+            {
+                "point": point,
+                "granularity": GRANULARITY_MAPPING[granularity],
+                "validfrom": moment.isoformat(),
+                "validto": (moment + step).isoformat(),
+                "volume": str(moment.hour * 1000 + point),
+            }
+        )
+        moment += step
+    return {"hydra:member": members, "hydra:totalItems": len(members)}
+
+
+class MockCoordinator(PVForecastDataUpdateCoordinator):
+    """Coordinator serving fixed data to the sensors."""
+
+    def __init__(self, data):
+        super().__init__(hass=None, api_key="test", province="Groningen")
+        self.data = data
+
+    async def _async_update_data(self):
+        """Return the fixed data."""
+        return self.data
+
+
+@pytest.mark.parametrize("granularity", GRANULARITY_OPTIONS)
+def test_decode_response(benchmark, granularity):
+    """Benchmark decoding a full JSON-LD response body as the client does."""
+    members = synthetic_members(1, GRANULARITY_MAPPING[granularity], None, None)
+    body = json.dumps({"hydra:member": list(members)}).encode()
+    benchmark(lambda: _lean_page(json_loads(body), MEMBER_FIELDS))
+
+
+@pytest.mark.parametrize("granularity", GRANULARITY_OPTIONS)
+def test_build_index(benchmark, granularity):
+    """Benchmark parsing a response into per-day buckets and intervals."""
+    data = make_response(granularity)
+    benchmark(ForecastIndex.from_response, data)
+
+
+@pytest.mark.parametrize("granularity", GRANULARITY_OPTIONS[:-1])
+def test_resample_to_days(benchmark, granularity):
+    """Benchmark aggregating a response to daily totals."""
+    data = make_response(granularity)
+    benchmark(resample, data, "Day")
+
+
+@pytest.mark.parametrize("attribute_mode", ATTRIBUTE_MODE_OPTIONS)
+@pytest.mark.parametrize("granularity", GRANULARITY_OPTIONS)
+def test_sensor_states(benchmark, granularity, attribute_mode):
+    """Benchmark evaluating the state of every sensor of an entry."""
+    coordinator = MockCoordinator(make_response(granularity))
+    sensors = [
+        PVForecastSensor(
+            coordinator,
+            period_id=period_id,
+            days_ahead=period["days"],
+            period_name=period["name"],
+            entry_id="benchmark",
+            attribute_mode=attribute_mode,
+        )
+        for period_id, period in FORECAST_PERIODS.items()
+    ] + [
+        PVForecastIntervalSensor(
+            coordinator, sensor_id=sensor_id, sensor_name=sensor["name"], entry_id="benchmark"
+        )
+        for sensor_id, sensor in INTERVAL_SENSORS.items()
+    ]
+
+    def evaluate():
+        for sensor in sensors:
+            _ = sensor.native_value, sensor.extra_state_attributes
+
+    benchmark(evaluate)
+
+
+@pytest.fixture(name="event_loop_hass")
+def fixture_event_loop_hass(tmp_path):
+    """Return an event loop and a Home Assistant instance running on it."""
+
+    async def make_hass():
+        hass = HomeAssistant(str(tmp_path))
+        # Benchmarks must not be slowed down by the API quota
+        hass.data[DATA_RATE_LIMITER] = TokenBucket(rate=1e9, burst=1e9)
+        return hass
+
+    loop = asyncio.new_event_loop()
+    hass = loop.run_until_complete(make_hass())
+    yield loop, hass
+    loop.run_until_complete(hass.async_stop(force=True))
+    loop.close()
+
+
+@pytest.mark.parametrize("provinces", PROVINCE_COUNTS)
+@pytest.mark.parametrize("granularity", GRANULARITY_OPTIONS)
+def test_coordinator_refresh(benchmark, monkeypatch, event_loop_hass, granularity, provinces):
+    """Benchmark a full refresh of the coordinators of several provinces."""
+    loop, hass = event_loop_hass
+    server = TestServer(create_app())
+    loop.run_until_complete(server.start_server())
+    monkeypatch.setattr(api, "API_URL", str(server.make_url("/v1/utilizations")))
+    coordinators = []
+
+    async def refresh():
+        await asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators))
+        for coordinator in coordinators:
+            assert coordinator.last_update_success
+            _ = coordinator.forecast
+
+    def setup():
+        # Every round downloads and parses the whole window again, as the
+        # first refresh of an entry does
+        hass.data.pop(DATA_REQUEST_CACHE, None)
+        coordinators[:] = [
+            PVForecastDataUpdateCoordinator(
+                hass, api_key="benchmark", province=province, granularity=granularity
+            )
+            for province in list(PROVINCE_MAPPING)[:provinces]
+        ]
+
+    benchmark.pedantic(lambda: loop.run_until_complete(refresh()), setup=setup, rounds=10)
+    loop.run_until_complete(server.close())
@@ -0,0 +1,9 @@
+"""Shared test setup."""
+from pathlib import Path
+import sys
+
+# The command line tool in src/ imports its modules, and the standard
+# library only modules of the integration, by their plain names
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT / "src"))
+sys.path.append(str(ROOT / "custom_components" / "pv_forecast"))
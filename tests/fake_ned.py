@@ -0,0 +1,241 @@
+"""Local stand-in for the NED.nl utilizations API.
+
+Serves synthetic or recorded JSON-LD forecasts with the API's pagination,
+and can add latency and inject 429 and 5xx responses, so the integration
+and the command line tool can be load-tested without an API key or
+network access.
+
+Use create_app() with aiohttp's TestServer in tests, or run it standalone
+and point the integration or the command line tool at it::
+
+    python -m tests.fake_ned --port 8080 --latency 0.2 --error-rate 0.1
+    NED_API_URL=http://localhost:8080/v1/utilizations python src/main.py key Utrecht
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+import hashlib
+import json
+import math
+import random
+from typing import Any
+from urllib.parse import urlencode
+
+from aiohttp import web
+
+PATH = "/v1/utilizations"
+DEFAULT_ITEMS_PER_PAGE = 200
+GRANULARITY_STEPS = {
+    3: timedelta(minutes=10),
+    4: timedelta(minutes=15),
+    5: timedelta(hours=1),
+    6: timedelta(days=1),
+}
+ERROR_STATUSES = (500, 502, 503, 504)
+# Request, fault and 304 counts of an application
+STATS: web.AppKey[Counter[str]] = web.AppKey("stats", Counter)
+
+
+@dataclass
+class FakeNedConfig:  # pylint: disable=too-many-instance-attributes
+    """Behaviour of the fake API."""
+
+    api_key: str | None = None  # Any key is accepted when None
+    latency: float = 0.0  # Seconds added to every response
+    jitter: float = 0.0  # Up to this many seconds of extra random latency
+    rate_limit_rate: float = 0.0  # Fraction of requests answered with 429
+    error_rate: float = 0.0  # Fraction of requests answered with a 5xx
+    retry_after: float | None = 1.0  # Retry-After sent with 429 responses
+    max_page_size: int | None = None  # Cap on itemsPerPage, like the real API
+    recorded: list[dict[str, Any]] | None = None  # Served instead of synthetic data
+    seed: int | None = None  # Seed for reproducible latency and faults
+
+
+def create_app(config: FakeNedConfig | None = None) -> web.Application:
+    """Return an aiohttp application serving the fake API.
+
+    Request, fault and 304 counts are kept in app[STATS].
+    """
+    config = config or FakeNedConfig()
+    rng = random.Random(config.seed)
+    stats: Counter[str] = Counter()
+
+    async def handler(request: web.Request) -> web.StreamResponse:
+        stats["requests"] += 1
+        if delay := config.latency + rng.uniform(0, config.jitter):
+            await asyncio.sleep(delay)
+
+        token = request.headers.get("X-AUTH-TOKEN")
+        if not token or config.api_key not in (None, token):
+            stats["401"] += 1
+            return web.Response(status=401)
+
+        chance = rng.random()
+        if chance < config.rate_limit_rate:
+            stats["429"] += 1
+            headers = {}
+            if config.retry_after is not None:
+                headers["Retry-After"] = f"{config.retry_after:g}"
+            return web.Response(status=429, headers=headers)
+        if chance < config.rate_limit_rate + config.error_rate:
+            status = rng.choice(ERROR_STATUSES)
+            stats[str(status)] += 1
+            return web.Response(status=status)
+
+        body = json.dumps(_page(request.query, config)).encode()
+        etag = f'"{hashlib.sha1(body, usedforsecurity=False).hexdigest()}"'
+        if request.headers.get("If-None-Match") == etag:
+            stats["304"] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+
+        stats["200"] += 1
+        return web.Response(
+            body=body, content_type="application/ld+json", headers={"ETag": etag}
+        )
+
+    app = web.Application()
+    app[STATS] = stats
+    app.router.add_get(PATH, handler)
+    return app
+
+
+def _page(query: Any, config: FakeNedConfig) -> dict[str, Any]:
+    """Return one JSON-LD result page for a query."""
+    if config.recorded is not None:
+        members = config.recorded
+    else:
+        members = synthetic_members(
+            int(query.get("point", 0)),
+            int(query.get("granularity", 5)),
+            query.get("validfrom[after]"),
+            query.get("validfrom[strictly_before]"),
+        )
+
+    per_page = int(query.get("itemsPerPage", DEFAULT_ITEMS_PER_PAGE))
+    if config.max_page_size is not None:
+        per_page = min(per_page, config.max_page_size)
+    per_page = max(per_page, 1)
+    page = max(int(query.get("page", 1)), 1)
+    last = max(-(-len(members) // per_page), 1)
+
+    def link(number: int) -> str:
+        return f"{PATH}?{urlencode({**query, 'page': number})}"
+
+    view = {
+        "@id": link(page),
+        "@type": "hydra:PartialCollectionView",
+        "hydra:first": link(1),
+        "hydra:last": link(last),
+    }
+    if page > 1:
+        view["hydra:previous"] = link(page - 1)
+    if page < last:
+        view["hydra:next"] = link(page + 1)
+
+    return {
+        "@context": "/v1/contexts/Utilization",
+        "@id": PATH,
+        "@type": "hydra:Collection",
+        "hydra:member": list(members[(page - 1) * per_page : page * per_page]),
+        "hydra:totalItems": len(members),
+        "hydra:view": view,
+    }
+
+
+@lru_cache(maxsize=64)
+def synthetic_members(
+    point: int, granularity: int, after: str | None, before: str | None
+) -> tuple[dict[str, Any], ...]:
+    """Return a day-shaped solar forecast for a point and date range.
+
+    Dates default to a week from the start of today (UTC).
+    """
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = _date(after) or today
+    end = _date(before) or start + timedelta(days=7)
+    step = GRANULARITY_STEPS.get(granularity, timedelta(hours=1))
+    hours = step.total_seconds() / 3600
+    capacity = 1000 + 250 * point  # MW of installed solar capacity
+
+    members = []
+    moment = start
+    while moment < end:
+        if granularity == 6:
+            volume = capacity * 4.0 * 1000
+        else:
+            hour = moment.hour + moment.minute / 60 + hours / 2
+            volume = capacity * max(0.0, math.sin(math.pi * (hour - 5) / 15)) * hours * 1000
+        members.append(
+            {
+                "@id": f"{PATH}/{point}{int(moment.timestamp())}",
+                "@type": "Utilization",
+                "id": int(f"{point}{int(moment.timestamp())}"),
+                "point": f"/v1/points/{point}",
+                "type": "/v1/types/2",
+                "granularity": f"/v1/granularities/{granularity}",
+                "granularitytimezone": "/v1/granularity_time_zones/0",
+                "activity": "/v1/activities/1",
+                "classification": "/v1/classifications/1",
+                "capacity": round(volume / hours),
+                "volume": round(volume),
+                "percentage": round(volume / (capacity * 1000 * hours), 4),
+                "emission": 0,
+                "emissionfactor": 0,
+                "validfrom": moment.isoformat(),
+                "validto": (moment + step).isoformat(),
+                "lastupdate": today.isoformat(),
+            }
+        )
+        moment += step
+    return tuple(members)
+
+
+def _date(value: str | None) -> datetime | None:
+    """Parse a YYYY-MM-DD date filter as the start of that day in UTC."""
+    if not value:
+        return None
+    return datetime.fromisoformat(value[:10]).replace(tzinfo=timezone.utc)
+
+
+def main() -> None:
+    """Run the fake API until interrupted."""
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the NED.nl API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--api-key", help="accept only this API key (default: any)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many extra random seconds")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with a 5xx")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After of 429 responses")
+    parser.add_argument("--max-page-size", type=int, help="cap on itemsPerPage")
+    parser.add_argument("--recorded", help="JSON-LD response file whose members are served instead")
+    parser.add_argument("--seed", type=int, help="seed for reproducible latency and faults")
+    args = parser.parse_args()
+
+    recorded = None
+    if args.recorded:
+        with open(args.recorded, encoding="utf-8") as file:
+            recorded = json.load(file)["hydra:member"]
+
+    config = FakeNedConfig(
+        api_key=args.api_key,
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit_rate=args.rate_limit_rate,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        max_page_size=args.max_page_size,
+        recorded=recorded,
+        seed=args.seed,
+    )
+    web.run_app(create_app(config), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
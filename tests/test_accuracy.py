@@ -0,0 +1,51 @@
+"""Test the streaming forecast accuracy."""
+from datetime import date, timedelta
+
+from custom_components.pv_forecast.accuracy import AccuracyTracker, RingBuffer
+
+TODAY = date(2025, 7, 20)
+
+
+def test_ring_buffer():
+    """Test the buffer keeps the last values and their running sums."""
+    buffer = RingBuffer(3)
+    for value in (1, -2, 3, -4):
+        buffer.append(value)
+
+    assert len(buffer) == 3
+    assert buffer.values() == [-2, 3, -4]
+    assert buffer.total == -3
+    assert buffer.absolute_total == 9
+    assert RingBuffer(3, buffer.values()).values() == buffer.values()
+
+
+def test_tracker_scores_per_horizon():
+    """Test forecasts are scored per horizon once their day has passed."""
+    tracker = AccuracyTracker(horizons=2, window=2)
+    for offset, error in enumerate((2, -1, 4)):
+        issued = TODAY + timedelta(days=offset)
+        day = issued + timedelta(days=1)
+        tracker.record_forecast(issued, {day: 10 + error, day + timedelta(days=5): 1})
+        tracker.record_forecast(day, {day: 10})
+        assert tracker.pending_days(day) == []
+        assert tracker.pending_days(day + timedelta(days=1)) == [day]
+        tracker.record_actual(day, 10)
+
+    tomorrow = tracker.stats(1)
+    assert tomorrow.samples == 2  # The oldest error left the window
+    assert tomorrow.mae == 2.5
+    assert tomorrow.bias == 1.5
+    assert tracker.stats(0).mae == 0
+
+    restored = AccuracyTracker.from_dict(2, 2, tracker.as_dict())
+    assert restored.stats(1) == tomorrow
+
+
+def test_tracker_drops_days_without_actuals():
+    """Test days whose actuals never come in do not pile up."""
+    tracker = AccuracyTracker(horizons=1, window=10)
+    tracker.record_forecast(TODAY, {TODAY: 5})
+
+    assert tracker.pending_days(TODAY + timedelta(days=1)) == [TODAY]
+    assert tracker.pending_days(TODAY + timedelta(days=10)) == []
+    assert tracker.stats(0) is None
@@ -0,0 +1,257 @@
+"""Test the NED.nl API client."""
+import asyncio
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+import pytest
+
+from custom_components.pv_forecast import api
+from custom_components.pv_forecast.api import (
+    NedApiAuthError,
+    NedApiClient,
+    NedApiError,
+    NedRequestCache,
+)
+from custom_components.pv_forecast.ratelimit import TokenBucket
+
+
+async def start_server(monkeypatch, handler):
+    """Serve a handler locally and point the client at it."""
+    app = web.Application()
+    app.router.add_get("/v1/utilizations", handler)
+    server = TestServer(app)
+    await server.start_server()
+    monkeypatch.setattr(api, "API_URL", str(server.make_url("/v1/utilizations")))
+    return server
+
+
+@pytest.mark.asyncio
+async def test_get_utilizations(monkeypatch):
+    """Test a JSON-LD response is decoded and the key is sent."""
+    seen = {}
+
+    async def handler(request):
+        seen["token"] = request.headers["X-AUTH-TOKEN"]
+        seen["point"] = request.query["point"]
+        return web.json_response(
+            {"hydra:member": []}, content_type="application/ld+json"
+        )
+
+    server = await start_server(monkeypatch, handler)
+    async with aiohttp.ClientSession() as session:
+        client = NedApiClient(session, "secret")
+        data = await client.async_get_utilizations({"point": 1})
+    await server.close()
+
+    assert data == {"hydra:member": []}
+    assert seen == {"token": "secret", "point": "1"}
+
+
+@pytest.mark.asyncio
+async def test_get_utilizations_errors(monkeypatch):
+    """Test auth and server errors are raised as API errors."""
+    statuses = [401, 500]
+
+    async def handler(_request):
+        return web.Response(status=statuses.pop(0))
+
+    server = await start_server(monkeypatch, handler)
+    async with aiohttp.ClientSession() as session:
+        client = NedApiClient(session, "secret", max_retries=0)
+        with pytest.raises(NedApiAuthError):
+            await client.async_get_utilizations({})
+        with pytest.raises(NedApiError):
+            await client.async_get_utilizations({})
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_get_utilizations_retries_after_rate_limit(monkeypatch):
+    """Test a 429 response is retried after the Retry-After delay."""
+    responses = [
+        web.Response(status=429, headers={"Retry-After": "0"}),
+        web.json_response({"hydra:member": []}, content_type="application/ld+json"),
+    ]
+
+    async def handler(_request):
+        return responses.pop(0)
+
+    server = await start_server(monkeypatch, handler)
+    async with aiohttp.ClientSession() as session:
+        client = NedApiClient(session, "secret", limiter=TokenBucket())
+        data = await client.async_get_utilizations({})
+    await server.close()
+
+    assert data == {"hydra:member": []}
+    assert not responses
+
+
+@pytest.mark.asyncio
+async def test_get_all_utilizations_merges_pages(monkeypatch):
+    """Test all pages are fetched and merged in order."""
+    requested = []
+
+    async def handler(request):
+        page = int(request.query["page"])
+        requested.append(page)
+        return web.json_response(
+            {
+                "hydra:member": [{"validfrom": f"2025-07-20T0{9 - page}:00:00"}],
+                "hydra:view": {
+                    "hydra:last": f"/v1/utilizations?page=3&itemsPerPage={request.query['itemsPerPage']}",
+                },
+            },
+            content_type="application/ld+json",
+        )
+
+    server = await start_server(monkeypatch, handler)
+    async with aiohttp.ClientSession() as session:
+        client = NedApiClient(session, "secret")
+        data = await client.async_get_all_utilizations({}, page_size=1)
+    await server.close()
+
+    assert sorted(requested) == [1, 2, 3]
+    assert [member["validfrom"] for member in data["hydra:member"]] == [
+        "2025-07-20T06:00:00",
+        "2025-07-20T07:00:00",
+        "2025-07-20T08:00:00",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_all_utilizations_follows_next_links(monkeypatch):
+    """Test pages are followed when only next links are given."""
+
+    async def handler(request):
+        page = int(request.query["page"])
+        view = {"hydra:next": f"/v1/utilizations?page={page + 1}"} if page < 2 else {}
+        return web.json_response(
+            {
+                "hydra:member": [{"validfrom": f"2025-07-20T0{page}:00:00"}],
+                "hydra:view": view,
+            },
+            content_type="application/ld+json",
+        )
+
+    server = await start_server(monkeypatch, handler)
+    async with aiohttp.ClientSession() as session:
+        client = NedApiClient(session, "secret")
+        data = await client.async_get_all_utilizations({}, page_size=1)
+    await server.close()
+
+    assert data["hydra:totalItems"] == 2
+
+
+@pytest.mark.asyncio
+async def test_request_cache_coalesces_and_caches():
+    """Test identical requests share one fetch and its result."""
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0)
+        return {"hydra:member": []}
+
+    cache = NedRequestCache(ttl=60)
+    key = ("secret", ("point", 1))
+    first, second = await asyncio.gather(
+        cache.async_get(key, fetch), cache.async_get(key, fetch)
+    )
+    third = await cache.async_get(key, fetch)
+
+    assert len(calls) == 1
+    assert first is second is third
+    await cache.async_get(("secret", ("point", 2)), fetch)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_request_cache_does_not_keep_errors():
+    """Test a failed request is retried by the next caller."""
+
+    async def fail():
+        raise NedApiError("boom")
+
+    async def fetch():
+        return {}
+
+    cache = NedRequestCache(ttl=60)
+    with pytest.raises(NedApiError):
+        await cache.async_get(("secret",), fail)
+    assert await cache.async_get(("secret",), fetch) == {}
+
+
+@pytest.mark.asyncio
+async def test_unchanged_forecast_is_not_parsed_again(monkeypatch):
+    """Test conditional requests and unchanged bodies reuse the last result."""
+    seen = []
+
+    async def handler(request):
+        seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+        return web.json_response(
+            {"hydra:member": [{"validfrom": "2025-07-20T10:00:00"}]},
+            content_type="application/ld+json",
+            headers={"ETag": '"v1"'} if len(seen) > 1 else {},
+        )
+
+    server = await start_server(monkeypatch, handler)
+    async with aiohttp.ClientSession() as session:
+        client = NedApiClient(session, "secret")
+        first = await client.async_get_all_utilizations({}, page_size=10)
+        # Same body without validators is recognised by its digest
+        second = await client.async_get_all_utilizations({}, page_size=10)
+        # Now the server answers the ETag with 304 Not Modified
+        third = await client.async_get_all_utilizations({}, page_size=10)
+    await server.close()
+
+    assert seen == [None, None, '"v1"']
+    assert first is second is third
+
+
+@pytest.mark.asyncio
+async def test_get_utilizations_keeps_only_requested_fields(monkeypatch):
+    """Test responses are decoded into lean members with numeric volumes."""
+
+    async def handler(_request):
+        return web.json_response(
+            {
+                "@context": "/v1/contexts/Utilization",
+                "hydra:member": [
+                    {
+                        "@id": "/v1/utilizations/1",
+                        "validfrom": "2025-07-20T10:00:00+00:00",
+                        "validto": "2025-07-20T11:00:00+00:00",
+                        "volume": "1500",
+                        "capacity": 1500,
+                        "emission": 0,
+                    }
+                ],
+                "hydra:totalItems": 1,
+            },
+            content_type="application/ld+json",
+        )
+
+    server = await start_server(monkeypatch, handler)
+    async with aiohttp.ClientSession() as session:
+        lean = await NedApiClient(session, "secret").async_get_utilizations({})
+        with_capacity = await NedApiClient(
+            session, "secret", fields=("validfrom", "capacity")
+        ).async_get_utilizations({})
+    await server.close()
+
+    assert lean == {
+        "hydra:member": [
+            {
+                "validfrom": "2025-07-20T10:00:00+00:00",
+                "validto": "2025-07-20T11:00:00+00:00",
+                "volume": 1500.0,
+            }
+        ],
+        "hydra:totalItems": 1,
+    }
+    assert with_capacity["hydra:member"] == [
+        {"validfrom": "2025-07-20T10:00:00+00:00", "capacity": 1500.0}
+    ]
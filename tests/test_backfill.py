@@ -0,0 +1,95 @@
+"""Test the resumable backfill of the command line tool."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from timeseries import ForecastStore, SeriesKey
+from backfill import Checkpoint, run_backfill, split_range
+from main import build_parser
+
+PROVINCES = ["Groningen", "Utrecht"]
+START = datetime(2025, 7, 1)
+END = datetime(2025, 7, 15)
+
+
+def series_key(province):
+    """Return a store key per province."""
+    return SeriesKey(PROVINCES.index(province) + 1, 2, 1, 5)
+
+
+def chunk_data(chunk_start, volume):
+    """Return API data with one hourly entry at the start of a chunk."""
+    start = chunk_start.replace(tzinfo=timezone.utc)
+    return {
+        "hydra:member": [
+            {
+                "validfrom": start.isoformat(),
+                "validto": (start + timedelta(hours=1)).isoformat(),
+                "volume": volume,
+            }
+        ]
+    }
+
+
+def test_split_range():
+    """Test a range is split into chunks of at most the given number of days."""
+    assert split_range(START, datetime(2025, 7, 17), chunk_days=7) == [
+        (START, datetime(2025, 7, 8)),
+        (datetime(2025, 7, 8), datetime(2025, 7, 15)),
+        (datetime(2025, 7, 15), datetime(2025, 7, 17)),
+    ]
+    assert not split_range(START, START)
+
+
+def test_checkpoint(tmp_path):
+    """Test completed chunks are remembered across runs."""
+    path = tmp_path / "pv.db.checkpoint"
+    key = Checkpoint.key("Utrecht", START, END)
+    assert key == "Utrecht 2025-07-01 2025-07-15"
+
+    checkpoint = Checkpoint(path)
+    assert key not in checkpoint
+    checkpoint.mark_done(key)
+    assert key in checkpoint
+    assert key in Checkpoint(path)
+
+
+def test_run_backfill_resumes(tmp_path):
+    """Test failed chunks are retried on the next run and done chunks skipped."""
+    store_path = str(tmp_path / "pv.db")
+    fetched = []
+    failing = {("Utrecht", START)}
+
+    def fetch(province, chunk_start, _chunk_end):
+        fetched.append((province, chunk_start))
+        if (province, chunk_start) in failing:
+            return None
+        return chunk_data(chunk_start, len(fetched))
+
+    assert run_backfill(fetch, series_key, PROVINCES, START, END, store_path, 7) == 1
+    assert len(fetched) == 4
+
+    fetched.clear()
+    failing.clear()
+    assert run_backfill(fetch, series_key, PROVINCES, START, END, store_path, 7) == 0
+    assert fetched == [("Utrecht", START)]
+
+    fetched.clear()
+    assert run_backfill(fetch, series_key, PROVINCES, START, END, store_path, 7) == 0
+    assert not fetched
+
+    start, end = START.replace(tzinfo=timezone.utc), END.replace(tzinfo=timezone.utc)
+    with ForecastStore(store_path) as store:
+        for province in PROVINCES:
+            assert len(store.query(series_key(province), start, end)) == 2
+
+
+@pytest.mark.parametrize("option", ["--chunk-days", "--max-age"])
+def test_positive_int_options(option):
+    """Test day and age options accept positive integers only."""
+    parser = build_parser()
+    args = parser.parse_args(["key", "Utrecht", option, "3"])
+    assert getattr(args, option[2:].replace("-", "_")) == 3
+    for value in ("0", "-1", "three"):
+        with pytest.raises(SystemExit):
+            parser.parse_args(["key", "Utrecht", option, value])
@@ -0,0 +1,71 @@
+"""Test the province parsing and output writers of the command line tool."""
+import argparse
+import csv
+import io
+import json
+
+import pytest
+
+from main import PROVINCE_POINT_MAPPING, parse_provinces
+from output import open_writer
+
+DATA = {
+    "hydra:member": [
+        {"validfrom": "2025-07-20T10:00:00+00:00", "validto": "2025-07-20T11:00:00+00:00", "volume": "1.5"},
+        {"validfrom": "2025-07-20T11:00:00+00:00", "validto": "2025-07-20T12:00:00+00:00", "volume": 2},
+    ]
+}
+
+
+def test_parse_provinces():
+    """Test a single name, a comma-separated list and 'all' are accepted."""
+    assert parse_provinces("Utrecht") == ["Utrecht"]
+    assert parse_provinces("Utrecht, Zeeland,") == ["Utrecht", "Zeeland"]
+    assert parse_provinces(" ALL ") == list(PROVINCE_POINT_MAPPING)
+
+
+@pytest.mark.parametrize("value", ["Atlantis", "Utrecht,Atlantis", "", ","])
+def test_parse_provinces_unknown(value):
+    """Test unknown or missing names are rejected."""
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_provinces(value)
+
+
+def test_csv_output(tmp_path):
+    """Test CSV output has a header and one row per entry of every province."""
+    path = tmp_path / "forecast.csv"
+    with open_writer("csv", str(path)) as writer:
+        writer.write("Utrecht", DATA)
+        writer.write("Zeeland", {"hydra:member": DATA["hydra:member"][:1]})
+
+    with open(path, encoding="utf-8", newline="") as file:
+        rows = list(csv.DictReader(file))
+    assert [(row["province"], row["valid_from"], row["volume"]) for row in rows] == [
+        ("Utrecht", "2025-07-20T10:00:00+00:00", "1.5"),
+        ("Utrecht", "2025-07-20T11:00:00+00:00", "2.0"),
+        ("Zeeland", "2025-07-20T10:00:00+00:00", "1.5"),
+    ]
+
+
+def test_jsonl_output(monkeypatch):
+    """Test JSON Lines output writes one object per entry to stdout."""
+    stdout = io.StringIO()
+    monkeypatch.setattr("sys.stdout", stdout)
+    with open_writer("jsonl") as writer:
+        writer.write("Utrecht", DATA)
+        writer.write("Zeeland", {})
+
+    assert [json.loads(line) for line in stdout.getvalue().splitlines()] == [
+        {
+            "province": "Utrecht",
+            "valid_from": "2025-07-20T10:00:00+00:00",
+            "valid_to": "2025-07-20T11:00:00+00:00",
+            "volume": 1.5,
+        },
+        {
+            "province": "Utrecht",
+            "valid_from": "2025-07-20T11:00:00+00:00",
+            "valid_to": "2025-07-20T12:00:00+00:00",
+            "volume": 2.0,
+        },
+    ]
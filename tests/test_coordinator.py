@@ -0,0 +1,308 @@
+"""Test the coordinator against the local NED.nl stand-in."""
+from datetime import datetime, timedelta, timezone
+
+from aiohttp.test_utils import TestServer
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+import pytest
+
+from custom_components.pv_forecast import api, coordinator as coordinator_module
+from custom_components.pv_forecast.const import (
+    DATA_GRANULARITIES,
+    DATA_RATE_LIMITER,
+    DATA_REQUEST_CACHE,
+    DATA_TIMESERIES,
+)
+from custom_components.pv_forecast.coordinator import (
+    PVForecastDataUpdateCoordinator,
+    merge_window,
+)
+from custom_components.pv_forecast.ratelimit import TokenBucket
+from custom_components.pv_forecast.sensor import (
+    DIAGNOSTIC_SENSORS,
+    PVForecastDiagnosticSensor,
+)
+from tests.fake_ned import STATS, FakeNedConfig, create_app, synthetic_members
+
+
+@pytest.mark.asyncio
+async def test_refresh_stats(monkeypatch, tmp_path):
+    """Test a refresh records its statistics for the diagnostic sensors."""
+    server = TestServer(create_app(FakeNedConfig(max_page_size=100)))
+    await server.start_server()
+    monkeypatch.setattr(api, "API_URL", str(server.make_url("/v1/utilizations")))
+    hass = HomeAssistant(str(tmp_path))
+    hass.data[DATA_RATE_LIMITER] = TokenBucket(rate=1e9, burst=1e9)
+
+    coordinators = [
+        PVForecastDataUpdateCoordinator(
+            hass, api_key="secret", province="Utrecht", granularity="15 minutes"
+        )
+        for _ in range(2)
+    ]
+    for coordinator in coordinators:
+        await coordinator.async_refresh()
+    await server.close()
+    await hass.async_stop(force=True)
+
+    first, second = (coordinator.stats for coordinator in coordinators)
+    assert first.pages == first.requests == -(-first.entries // 100)
+    assert first.entries >= 7 * 96
+    assert first.bytes > 0
+    assert first.cache_hit_rate == 0
+    # The second entry is answered from the request cache
+    assert second.requests == 0
+    assert second.cache_hit_rate == 50
+
+    sensors = {
+        sensor_id: PVForecastDiagnosticSensor(
+            coordinators[0], sensor_id=sensor_id, sensor_info=info, entry_id="test"
+        )
+        for sensor_id, info in DIAGNOSTIC_SENSORS.items()
+    }
+    assert sensors["entries"].native_value == first.entries
+    assert sensors["fetch_latency"].native_value == round(first.fetch_latency * 1000, 1)
+
+
+@pytest.mark.asyncio
+async def test_incremental_refresh(monkeypatch, tmp_path):
+    """Test later refreshes only request the near term and merge it in."""
+    app = create_app(FakeNedConfig(max_page_size=100))
+    server = TestServer(app)
+    await server.start_server()
+    monkeypatch.setattr(api, "API_URL", str(server.make_url("/v1/utilizations")))
+    hass = HomeAssistant(str(tmp_path))
+    hass.data[DATA_RATE_LIMITER] = TokenBucket(rate=1e9, burst=1e9)
+
+    coordinator = PVForecastDataUpdateCoordinator(
+        hass, api_key="secret", province="Utrecht", granularity="15 minutes"
+    )
+    await coordinator.async_refresh()
+    full = coordinator.data
+    # Skip the shared request cache, as a refresh hours later would
+    hass.data.pop(DATA_REQUEST_CACHE)
+    await coordinator.async_refresh()
+    await server.close()
+    await hass.async_stop(force=True)
+
+    assert coordinator.stats.requests < len(full["hydra:member"]) // 100
+    assert coordinator.stats.pages == 2 * 96 // 100 + 1
+    assert coordinator.data["hydra:member"] == full["hydra:member"]
+
+
+def test_merge_window():
+    """Test merged responses replace older entries and drop past days."""
+    def entry(day, volume):
+        return {"validfrom": f"2025-07-{day}T00:00:00+00:00", "volume": volume}
+
+    merged = merge_window(
+        [
+            {"hydra:member": [entry(19, 1), entry(20, 2), entry(21, 3)]},
+            {"hydra:member": [entry(20, 4)]},
+            {"hydra:member": [entry(22, 5)]},
+        ],
+        datetime(2025, 7, 20, tzinfo=timezone.utc),
+        datetime(2025, 7, 23, tzinfo=timezone.utc),
+    )
+    assert [member["volume"] for member in merged["hydra:member"]] == [4, 3, 5]
+    assert merged["hydra:totalItems"] == 3
+
+
+@pytest.mark.asyncio
+async def test_accuracy(monkeypatch, tmp_path):
+    """Test past days are scored against the actual production."""
+    server = TestServer(create_app())
+    await server.start_server()
+    monkeypatch.setattr(api, "API_URL", str(server.make_url("/v1/utilizations")))
+    hass = HomeAssistant(str(tmp_path))
+    hass.data[DATA_RATE_LIMITER] = TokenBucket(rate=1e9, burst=1e9)
+
+    coordinator = PVForecastDataUpdateCoordinator(
+        hass, api_key="secret", province="Utrecht", accuracy_window=30
+    )
+    yesterday = dt_util.now().date() - timedelta(days=1)
+    coordinator.accuracy.record_forecast(yesterday, {yesterday: 1000.0})
+    await coordinator.async_refresh()
+    await server.close()
+    await hass.async_stop(force=True)
+
+    # The stand-in serves the same production for forecasts and actuals
+    stats = coordinator.accuracy.stats(0)
+    actual = sum(
+        member["volume"]
+        for member in synthetic_members(7, 5, yesterday.isoformat(), dt_util.now().date().isoformat())
+    )
+    assert stats.samples == 1
+    assert stats.bias == 1000.0 - actual
+    # Today's forecast waits for its day to pass
+    assert coordinator.accuracy.pending_days(dt_util.now().date()) == []
+
+
+@pytest.mark.asyncio
+async def test_statistics_import_gets_new_forecast(monkeypatch, tmp_path):
+    """Test the statistics import receives the forecast of the current refresh."""
+    server = TestServer(create_app())
+    await server.start_server()
+    monkeypatch.setattr(api, "API_URL", str(server.make_url("/v1/utilizations")))
+    imported = []
+
+    async def record_import(_coordinator, index):
+        imported.append(index.hourly())
+
+    monkeypatch.setattr(coordinator_module, "async_import_statistics", record_import)
+    hass = HomeAssistant(str(tmp_path))
+    hass.data[DATA_RATE_LIMITER] = TokenBucket(rate=1e9, burst=1e9)
+
+    coordinator = PVForecastDataUpdateCoordinator(
+        hass, api_key="secret", province="Utrecht"
+    )
+    days_read = []
+
+    class ReadingStore:
+        """A time-series store that lets a sensor read the forecast meanwhile."""
+
+        def upsert(self, _key, _members):
+            """Read the forecast during the write."""
+            days_read.append(len(coordinator.forecast))
+
+    hass.data[DATA_TIMESERIES] = ReadingStore()
+    await coordinator.async_refresh()
+    await server.close()
+    await hass.async_stop(force=True)
+
+    # The forecast of the old data is served until the refresh finishes
+    assert days_read == [0]
+    assert len(imported) == 1
+    assert imported[0]
+    assert imported[0] == coordinator.forecast.hourly()
+
+
+@pytest.mark.asyncio
+async def test_unchanged_forecast_detected_by_content(monkeypatch, tmp_path):
+    """Test refetched but identical forecasts are not reported as changed."""
+    server = TestServer(create_app())
+    await server.start_server()
+    monkeypatch.setattr(api, "API_URL", str(server.make_url("/v1/utilizations")))
+    persisted = []
+
+    async def record_import(_coordinator, index):
+        persisted.append(index)
+
+    monkeypatch.setattr(coordinator_module, "async_import_statistics", record_import)
+    hass = HomeAssistant(str(tmp_path))
+    hass.data[DATA_RATE_LIMITER] = TokenBucket(rate=1e9, burst=1e9)
+
+    coordinator = PVForecastDataUpdateCoordinator(
+        hass, api_key="secret", province="Utrecht", granularity="15 minutes"
+    )
+    changes = []
+    next_poll = coordinator.schedule.next_poll
+
+    def record_poll(now, changed):
+        changes.append(changed)
+        return next_poll(now, changed)
+
+    monkeypatch.setattr(coordinator.schedule, "next_poll", record_poll)
+    for _ in range(3):
+        # Skip the shared request cache, so every refresh downloads again
+        hass.data.pop(DATA_REQUEST_CACHE, None)
+        coordinator._client = None  # pylint: disable=protected-access
+        await coordinator.async_refresh()
+    await server.close()
+    await hass.async_stop(force=True)
+
+    assert changes == [True, False, False]
+    assert len(persisted) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("shared", [(), ("15 minutes",)])
+async def test_restored_forecast_refetched_unchanged(monkeypatch, tmp_path, shared):
+    """Test refetching a restored forecast is not taken for a new forecast run."""
+    server = TestServer(create_app())
+    await server.start_server()
+    monkeypatch.setattr(api, "API_URL", str(server.make_url("/v1/utilizations")))
+    persisted = []
+
+    async def record_import(_coordinator, index):
+        persisted.append(index)
+
+    hass = HomeAssistant(str(tmp_path))
+    hass.data[DATA_RATE_LIMITER] = TokenBucket(rate=1e9, burst=1e9)
+    hass.data[DATA_GRANULARITIES] = {("secret", "Utrecht", 7): ["Hour", *shared]}
+
+    # Persist a forecast as an earlier run of Home Assistant would have
+    previous = PVForecastDataUpdateCoordinator(
+        hass, api_key="secret", province="Utrecht", entry_id="entry"
+    )
+    await previous.async_refresh()
+    hass.data.pop(DATA_REQUEST_CACHE)
+
+    monkeypatch.setattr(coordinator_module, "async_import_statistics", record_import)
+    coordinator = PVForecastDataUpdateCoordinator(
+        hass, api_key="secret", province="Utrecht", entry_id="entry"
+    )
+    await coordinator.async_restore()
+    changes = []
+    next_poll = coordinator.schedule.next_poll
+
+    def record_poll(now, changed):
+        changes.append(changed)
+        return next_poll(now, changed)
+
+    monkeypatch.setattr(coordinator.schedule, "next_poll", record_poll)
+    restored = coordinator.data
+    await coordinator.async_refresh()
+    await server.close()
+    await hass.async_stop(force=True)
+
+    assert coordinator.stats.requests > 0
+    assert changes == [False]
+    assert not persisted
+    assert coordinator.data is restored
+
+
+class FakeEntry:
+    """The parts of a config entry the coordinator uses when it is set up."""
+
+    title = "PV Forecast NED.nl - Utrecht"
+
+    def __init__(self):
+        self.tasks = []
+
+    def async_create_background_task(self, hass, target, name):
+        """Run a task in the background, like a config entry does."""
+        task = hass.async_create_background_task(target, name)
+        self.tasks.append(task)
+        return task
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(("age", "requests"), [(timedelta(hours=1), 0), (timedelta(days=2), 1)])
+async def test_restore_or_refresh(monkeypatch, tmp_path, age, requests):
+    """Test a fresh persisted forecast is served without calling the API."""
+    app = create_app()
+    stats = app[STATS]
+    server = TestServer(app)
+    await server.start_server()
+    monkeypatch.setattr(api, "API_URL", str(server.make_url("/v1/utilizations")))
+    hass = HomeAssistant(str(tmp_path))
+    hass.data[DATA_RATE_LIMITER] = TokenBucket(rate=1e9, burst=1e9)
+
+    coordinator = PVForecastDataUpdateCoordinator(
+        hass, api_key="secret", province="Utrecht", entry_id="entry"
+    )
+    stored = {"hydra:member": list(synthetic_members(7, 5, None, None))}
+    await coordinator.store.async_save(
+        {"fetched": (dt_util.utcnow() - age).isoformat(), "data": stored}
+    )
+    entry = FakeEntry()
+    await coordinator.async_restore_or_refresh(entry)
+    for task in entry.tasks:
+        await task
+    await server.close()
+    await hass.async_stop(force=True)
+
+    assert stats.get("requests", 0) == requests
+    # A stale forecast is replaced by the refreshed one
+    assert (coordinator.data == stored) == (requests == 0)
@@ -0,0 +1,51 @@
+"""Test the energy dashboard support."""
+from homeassistant.core import HomeAssistant
+import pytest
+
+from custom_components.pv_forecast.const import DOMAIN
+from custom_components.pv_forecast.energy import (
+    async_get_solar_forecast,
+    async_import_statistics,
+    statistic_id,
+)
+from tests.test_sensor_compat import MockCoordinator, make_entry
+
+
+@pytest.mark.asyncio
+async def test_solar_forecast(tmp_path):
+    """Test the forecast is returned in Wh per hour for the energy dashboard."""
+    coordinator = MockCoordinator(
+        {
+            "hydra:member": [
+                make_entry("2025-07-20T10:00:00+00:00", "2025-07-20T10:30:00+00:00", 1.5),
+                make_entry("2025-07-20T10:30:00+00:00", "2025-07-20T11:00:00+00:00", 2),
+            ]
+        }
+    )
+    hass = HomeAssistant(str(tmp_path))
+    hass.data[DOMAIN] = {"entry": coordinator}
+
+    assert await async_get_solar_forecast(hass, "entry") == {
+        "wh_hours": {"2025-07-20T10:00:00+00:00": 3500}
+    }
+    assert await async_get_solar_forecast(hass, "other") is None
+
+    # Without the recorder there is nothing to import into
+    coordinator.hass = hass
+    await async_import_statistics(coordinator, coordinator.forecast)
+    await hass.async_stop(force=True)
+
+    assert statistic_id("01J3ABCDEF") == "pv_forecast:forecast_01j3abcdef"
+
+
+@pytest.mark.asyncio
+async def test_no_solar_forecast_for_days(tmp_path):
+    """Test daily forecasts are not spread over the hours of the dashboard."""
+    coordinator = MockCoordinator(
+        {"hydra:member": [make_entry("2025-07-20T00:00:00+00:00", "2025-07-21T00:00:00+00:00", 48)]}
+    )
+    hass = HomeAssistant(str(tmp_path))
+    hass.data[DOMAIN] = {"entry": coordinator}
+
+    assert await async_get_solar_forecast(hass, "entry") is None
+    await hass.async_stop(force=True)
@@ -0,0 +1,71 @@
+"""Test the API client against the local NED.nl stand-in."""
+import aiohttp
+from aiohttp.test_utils import TestServer
+import pytest
+
+from custom_components.pv_forecast import api
+from custom_components.pv_forecast.api import NedApiAuthError, NedApiClient
+from tests.fake_ned import STATS, FakeNedConfig, create_app
+
+PARAMS = {
+    "point": 7,
+    "granularity": 3,
+    "validfrom[after]": "2025-07-20",
+    "validfrom[strictly_before]": "2025-07-22",
+}
+
+
+async def start_fake(monkeypatch, config):
+    """Serve the fake API locally and point the client at it."""
+    app = create_app(config)
+    server = TestServer(app)
+    await server.start_server()
+    monkeypatch.setattr(api, "API_URL", str(server.make_url("/v1/utilizations")))
+    return server, app[STATS]
+
+
+@pytest.mark.asyncio
+async def test_fetch_all_capped_pages(monkeypatch):
+    """Test every page is fetched when the server caps the page size."""
+    server, stats = await start_fake(monkeypatch, FakeNedConfig(max_page_size=50))
+    async with aiohttp.ClientSession() as session:
+        client = NedApiClient(session, "secret")
+        data = await client.async_get_all_utilizations(PARAMS, page_size=200)
+    await server.close()
+
+    members = data["hydra:member"]
+    assert len(members) == 288
+    assert members[0]["validfrom"] == "2025-07-20T00:00:00+00:00"
+    assert members[-1]["validto"] == "2025-07-22T00:00:00+00:00"
+    assert stats["requests"] == 6
+
+
+@pytest.mark.asyncio
+async def test_fetch_all_with_faults(monkeypatch):
+    """Test rate limited requests are retried until every page is in."""
+    config = FakeNedConfig(rate_limit_rate=0.5, retry_after=0, seed=1)
+    server, stats = await start_fake(monkeypatch, config)
+    async with aiohttp.ClientSession() as session:
+        client = NedApiClient(session, "secret", max_retries=20)
+        data = await client.async_get_all_utilizations(PARAMS, page_size=50)
+    await server.close()
+
+    assert len(data["hydra:member"]) == 288
+    assert stats["429"] > 0
+    assert stats["200"] == 6
+
+
+@pytest.mark.asyncio
+async def test_conditional_requests_and_auth(monkeypatch):
+    """Test unchanged pages are answered with 304 and wrong keys rejected."""
+    server, stats = await start_fake(monkeypatch, FakeNedConfig(api_key="secret"))
+    async with aiohttp.ClientSession() as session:
+        client = NedApiClient(session, "secret")
+        first = await client.async_get_utilizations(PARAMS)
+        second = await client.async_get_utilizations(PARAMS)
+        with pytest.raises(NedApiAuthError):
+            await NedApiClient(session, "wrong").async_get_utilizations(PARAMS)
+    await server.close()
+
+    assert second is first
+    assert stats["304"] == 1
@@ -0,0 +1,139 @@
+"""Test the parsed forecast index."""
+from datetime import date, datetime, timezone
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.pv_forecast.forecast import ForecastIndex
+
+
+def make_entry(validfrom, validto, volume):
+    """Create a mock API entry."""
+    return {
+        "validfrom": validfrom,
+        "validto": validto,
+        "volume": volume,
+    }
+
+
+def test_index_buckets_entries_per_day():
+    """Test entries are grouped and summed per day."""
+    index = ForecastIndex.from_response(
+        {
+            "hydra:member": [
+                make_entry("2025-07-20T10:00:00", "2025-07-20T11:00:00", "1.5"),
+                make_entry("2025-07-20T11:00:00", "2025-07-20T12:00:00", 2.5),
+                make_entry("2025-07-21T10:00:00", "2025-07-21T11:00:00", 3),
+            ]
+        }
+    )
+    assert len(index) == 2
+    today = index.get(date(2025, 7, 20))
+    assert today.total == 4.0
+    assert [entry["volume"] for entry in today.entries] == [1.5, 2.5]
+    assert index.get(date(2025, 7, 21)).total == 3.0
+    assert index.get(date(2025, 7, 22)) is None
+
+
+def test_index_buckets_on_local_days():
+    """Test UTC entries are bucketed on the local date."""
+    dt_util.set_default_time_zone(dt_util.get_time_zone("Europe/Amsterdam"))
+    try:
+        index = ForecastIndex.from_response(
+            {
+                "hydra:member": [
+                    make_entry(
+                        "2025-07-19T22:00:00+00:00", "2025-07-19T23:00:00+00:00", 1
+                    ),
+                    make_entry(
+                        "2025-07-20T21:00:00+00:00", "2025-07-20T22:00:00+00:00", 2
+                    ),
+                ]
+            }
+        )
+    finally:
+        dt_util.set_default_time_zone(dt_util.UTC)
+
+    assert index.get(date(2025, 7, 19)) is None
+    assert index.get(date(2025, 7, 20)).total == 3.0
+
+
+def test_index_empty_response():
+    """Test an empty or missing response gives an empty index."""
+    assert len(ForecastIndex.from_response(None)) == 0
+    assert len(ForecastIndex.from_response({})) == 0
+
+
+def test_compact_detail():
+    """Test regular and irregular days are encoded compactly."""
+    index = ForecastIndex.from_response(
+        {
+            "hydra:member": [
+                make_entry("2025-07-20T10:00:00", "2025-07-20T11:00:00", 1),
+                make_entry("2025-07-20T11:00:00", "2025-07-20T12:00:00", 2),
+                make_entry("2025-07-21T10:00:00", "2025-07-21T11:00:00", 3),
+                make_entry("2025-07-21T13:00:00", "2025-07-21T14:00:00", 4),
+            ]
+        }
+    )
+    assert index.get(date(2025, 7, 20)).compact == {
+        "start": "2025-07-20T10:00:00",
+        "step": 3600,
+        "values": [1.0, 2.0],
+    }
+    assert index.get(date(2025, 7, 21)).compact == {
+        "valid_from": ["2025-07-21T10:00:00", "2025-07-21T13:00:00"],
+        "values": [3.0, 4.0],
+    }
+
+
+def test_interval_lookups():
+    """Test lookups of the interval at, after and around a moment."""
+    index = ForecastIndex.from_response(
+        {
+            "hydra:member": [
+                make_entry(
+                    f"2025-07-20T{hour:02d}:00:00+00:00",
+                    f"2025-07-20T{hour + 1:02d}:00:00+00:00",
+                    hour,
+                )
+                for hour in range(10, 14)
+            ]
+        }
+    )
+    moment = datetime(2025, 7, 20, 11, 30, tzinfo=timezone.utc)
+    assert index.interval_at(moment).volume == 11
+    assert index.next_interval(moment).volume == 12
+    assert index.next_boundary(moment) == datetime(2025, 7, 20, 12, tzinfo=timezone.utc)
+    assert index.remaining(moment, datetime(2025, 7, 21, tzinfo=timezone.utc)) == 36
+    assert index.remaining(moment, datetime(2025, 7, 20, 13, tzinfo=timezone.utc)) == 23
+    assert index.peak(
+        datetime(2025, 7, 20, tzinfo=timezone.utc),
+        datetime(2025, 7, 21, tzinfo=timezone.utc),
+    ).start == datetime(2025, 7, 20, 13, tzinfo=timezone.utc)
+
+    late = datetime(2025, 7, 20, 15, tzinfo=timezone.utc)
+    assert index.interval_at(late) is None
+    assert index.next_interval(late) is None
+    assert index.next_boundary(late) is None
+
+
+def test_hourly():
+    """Test intervals are summed per hour and days are left out."""
+    index = ForecastIndex.from_response(
+        {
+            "hydra:member": [
+                make_entry("2025-07-20T10:00:00+00:00", "2025-07-20T10:30:00+00:00", 1),
+                make_entry("2025-07-20T10:30:00+00:00", "2025-07-20T11:00:00+00:00", 2),
+                make_entry("2025-07-20T11:00:00+00:00", "2025-07-20T11:30:00+00:00", 4),
+            ]
+        }
+    )
+    assert index.hourly() == {
+        datetime(2025, 7, 20, 10, tzinfo=timezone.utc): 3.0,
+        datetime(2025, 7, 20, 11, tzinfo=timezone.utc): 4.0,
+    }
+
+    daily = ForecastIndex.from_response(
+        {"hydra:member": [make_entry("2025-07-20T00:00:00+00:00", "2025-07-21T00:00:00+00:00", 48)]}
+    )
+    assert daily.hourly() == {}
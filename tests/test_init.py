@@ -0,0 +1,26 @@
+"""Test the setup of the integration."""
+from datetime import datetime, timezone
+import sqlite3
+
+from homeassistant.core import HomeAssistant
+import pytest
+
+from custom_components.pv_forecast import async_setup
+from custom_components.pv_forecast.const import DATA_TIMESERIES
+from custom_components.pv_forecast.timeseries import SeriesKey
+
+
+@pytest.mark.asyncio
+async def test_timeseries_store_closed_on_stop(tmp_path):
+    """Test the shared store is opened once and closed when Home Assistant stops."""
+    hass = HomeAssistant(str(tmp_path))
+    assert await async_setup(hass, {})
+    store = hass.data[DATA_TIMESERIES]
+    assert (tmp_path / "pv_forecast.db").exists()
+
+    await hass.async_stop(force=True)
+
+    assert DATA_TIMESERIES not in hass.data
+    moment = datetime(2025, 7, 20, tzinfo=timezone.utc)
+    with pytest.raises(sqlite3.ProgrammingError):
+        store.query(SeriesKey(1, 2, 1, 5), moment, moment)
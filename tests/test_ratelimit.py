@@ -0,0 +1,56 @@
+"""Test the rate limiting helpers."""
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from custom_components.pv_forecast.ratelimit import (
+    BACKOFF_MAX,
+    TokenBucket,
+    backoff_delay,
+    retry_after_seconds,
+)
+
+
+def test_token_bucket_spreads_requests():
+    """Test requests beyond the burst have to wait for new tokens."""
+    now = [0.0]
+    bucket = TokenBucket(rate=2, burst=2, clock=lambda: now[0])
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0.5
+    assert bucket.reserve() == 1.0
+
+    now[0] = 10.0
+    assert bucket.reserve() == 0
+
+
+def test_token_bucket_pause():
+    """Test a pause holds back requests even with tokens left."""
+    now = [0.0]
+    bucket = TokenBucket(rate=1, burst=5, clock=lambda: now[0])
+    bucket.pause(30)
+    now[0] = 10.0
+    assert bucket.reserve() == 20.0
+
+
+def test_backoff_delay_grows_and_is_capped():
+    """Test backoff doubles per attempt within the jitter range."""
+    assert 1.0 <= backoff_delay(0) <= 2.0
+    assert 4.0 <= backoff_delay(2) <= 8.0
+    assert backoff_delay(20) <= 120.0
+
+
+def test_retry_after_seconds():
+    """Test both Retry-After formats are understood."""
+    assert retry_after_seconds(None) is None
+    assert retry_after_seconds("120") == 120.0
+    assert retry_after_seconds("soon") is None
+    later = datetime.now(timezone.utc) + timedelta(minutes=1)
+    assert 50 < retry_after_seconds(format_datetime(later, usegmt=True)) <= 60
+
+
+def test_retry_after_seconds_is_capped():
+    """Test a long Retry-After does not stall every request for its full length."""
+    assert retry_after_seconds("3600") == BACKOFF_MAX
+    later = datetime.now(timezone.utc) + timedelta(hours=1)
+    assert retry_after_seconds(format_datetime(later, usegmt=True)) == BACKOFF_MAX
@@ -0,0 +1,84 @@
+"""Test local resampling of forecast granularities."""
+from datetime import datetime, timedelta, timezone
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.pv_forecast.resample import resample, source_granularity
+
+
+def test_source_granularity_picks_finest_divisor():
+    """Test the finest evenly dividing granularity is chosen."""
+    assert source_granularity("Hour", ["Day", "15 minutes"]) == "15 minutes"
+    assert source_granularity("Day", ["10 minutes", "Hour"]) == "10 minutes"
+    assert source_granularity("15 minutes", ["10 minutes"]) == "15 minutes"
+    assert source_granularity("Hour", []) == "Hour"
+    # Days are summed locally, never requested from the API
+    assert source_granularity("Day", []) == "Hour"
+    assert source_granularity("Day", ["Day"]) == "Hour"
+
+
+def test_resample_sums_intervals():
+    """Test quarter hours are summed into hours."""
+    members = [
+        {
+            "validfrom": f"2025-07-20T10:{minute:02d}:00+00:00",
+            "validto": "",
+            "volume": "1.5",
+        }
+        for minute in (0, 15, 30, 45)
+    ] + [
+        {
+            "validfrom": "2025-07-20T11:00:00+00:00",
+            "validto": "2025-07-20T11:15:00+00:00",
+            "volume": 2,
+        }
+    ]
+
+    data = resample({"hydra:member": members}, "Hour")
+
+    assert data["hydra:member"] == [
+        {
+            "validfrom": "2025-07-20T10:00:00+00:00",
+            "validto": "2025-07-20T11:00:00+00:00",
+            "volume": 6.0,
+        },
+        {
+            "validfrom": "2025-07-20T11:00:00+00:00",
+            "validto": "2025-07-20T12:00:00+00:00",
+            "volume": 2.0,
+        },
+    ]
+    assert resample({}, "Day") == {"hydra:member": []}
+
+
+def test_resample_days_from_local_midnight():
+    """Test days are summed from local midnight, and partial days left out."""
+    start = datetime(2025, 10, 25, tzinfo=timezone.utc)
+    members = [
+        {
+            "validfrom": (start + timedelta(hours=hour)).isoformat(),
+            "validto": (start + timedelta(hours=hour + 1)).isoformat(),
+            "volume": 1,
+        }
+        for hour in range(72)
+    ]
+
+    dt_util.set_default_time_zone(dt_util.get_time_zone("Europe/Amsterdam"))
+    try:
+        data = resample({"hydra:member": members}, "Day")
+    finally:
+        dt_util.set_default_time_zone(dt_util.UTC)
+
+    # Summer time ends on 26 October, which makes it 25 hours long
+    assert data["hydra:member"] == [
+        {
+            "validfrom": "2025-10-25T22:00:00+00:00",
+            "validto": "2025-10-26T23:00:00+00:00",
+            "volume": 25.0,
+        },
+        {
+            "validfrom": "2025-10-26T23:00:00+00:00",
+            "validto": "2025-10-27T23:00:00+00:00",
+            "volume": 24.0,
+        },
+    ]
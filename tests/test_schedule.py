@@ -0,0 +1,68 @@
+"""Test the publication-aware polling schedule."""
+from datetime import datetime, time, timedelta, timezone
+
+from custom_components.pv_forecast.const import REQUEST_CACHE_TTL
+from custom_components.pv_forecast.schedule import (
+    DEFAULT_DELAY,
+    RETRY_INTERVAL,
+    STAGGER_WINDOW,
+    PollSchedule,
+    stagger,
+)
+
+PUBLICATIONS = (time(6), time(18))
+
+
+def utc(hour, minute=0):
+    """Return a moment on a fixed day in UTC."""
+    return datetime(2025, 7, 20, tzinfo=timezone.utc) + timedelta(hours=hour, minutes=minute)
+
+
+def test_polls_after_next_publication():
+    """Test current data is polled again shortly after the next run."""
+    schedule = PollSchedule(timedelta(hours=24), PUBLICATIONS)
+
+    assert schedule.next_poll(utc(7), changed=True) == utc(18) + DEFAULT_DELAY
+    # Nothing new is expected before the next run
+    assert schedule.next_poll(utc(12), changed=False) == utc(18) + DEFAULT_DELAY
+    # Never wait longer than the maximum interval
+    short = PollSchedule(timedelta(hours=6), PUBLICATIONS)
+    assert short.next_poll(utc(7), changed=True) == utc(13)
+
+
+def test_backs_off_until_the_run_appears():
+    """Test a late run is retried with a growing interval and its lag learned."""
+    schedule = PollSchedule(timedelta(hours=24), PUBLICATIONS)
+    schedule.next_poll(utc(7), changed=True)
+
+    now = utc(18, 30)
+    for factor in (1, 2, 4):
+        poll = schedule.next_poll(now, changed=False)
+        assert poll - now == RETRY_INTERVAL * factor
+        now = poll
+    assert now == utc(19, 40)
+
+    assert schedule.next_poll(now, changed=True) == utc(30) + schedule.delay
+    assert schedule.delay == (DEFAULT_DELAY + timedelta(minutes=100)) / 2
+
+
+def test_earlier_polls_after_prompt_runs():
+    """Test runs found on the first poll make the schedule poll earlier."""
+    schedule = PollSchedule(timedelta(hours=24), PUBLICATIONS)
+    schedule.restored(utc(7))
+
+    schedule.next_poll(utc(18, 30), changed=True)
+    assert schedule.delay < DEFAULT_DELAY
+
+
+def test_stagger():
+    """Test entries get stable offsets within the stagger window."""
+    assert stagger(None) == timedelta()
+    assert stagger("entry") == stagger("entry")
+    assert timedelta() <= stagger("entry") < STAGGER_WINDOW
+    assert len({stagger(f"entry{i}") for i in range(10)}) > 1
+
+
+def test_retries_are_not_served_from_the_request_cache():
+    """Test staggered entries share results but retries fetch anew."""
+    assert STAGGER_WINDOW < REQUEST_CACHE_TTL < RETRY_INTERVAL
@@ -1,7 +1,20 @@
 
 """Test PVForecastSensor compatibility with Python 3.13 and Home Assistant 2025.7"""
 from datetime import datetime, timedelta
-from custom_components.pv_forecast.sensor import PVForecastSensor, FORECAST_PERIODS
+
+from homeassistant.core import ServiceCall
+from homeassistant.exceptions import ServiceValidationError
+import pytest
+
+from custom_components.pv_forecast.const import DOMAIN
+from custom_components.pv_forecast.sensor import (
+    DIAGNOSTIC_SENSORS,
+    FORECAST_PERIODS,
+    SERVICE_GET_DETAIL,
+    PVForecastDiagnosticSensor,
+    PVForecastSensor,
+    _async_get_detail,
+)
 from custom_components.pv_forecast.coordinator import PVForecastDataUpdateCoordinator
 
 class MockCoordinator(PVForecastDataUpdateCoordinator):
@@ -61,6 +74,36 @@ def test_native_value_none_for_missing_data():
     assert not sensor.extra_state_attributes["hourly_data"]
 
 
+def test_compact_attributes():
+    """Test the compact attribute mode replaces hourly_data."""
+    validfrom = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    entries = [
+        make_entry(
+            (validfrom + timedelta(hours=hour)).isoformat(),
+            (validfrom + timedelta(hours=hour + 1)).isoformat(),
+            hour,
+        )
+        for hour in range(3)
+    ]
+    coordinator = MockCoordinator({"hydra:member": entries})
+    sensor = PVForecastSensor(
+        coordinator=coordinator,
+        period_id="today",
+        days_ahead=0,
+        period_name="Today",
+        entry_id="test",
+        attribute_mode="Compact",
+    )
+    attrs = sensor.extra_state_attributes
+    assert "hourly_data" not in attrs
+    assert attrs["detail"] == {
+        "start": validfrom.isoformat(),
+        "step": 3600,
+        "values": [0.0, 1.0, 2.0],
+    }
+    assert "hourly_data" in PVForecastSensor._unrecorded_attributes  # pylint: disable=protected-access
+
+
 def test_forecast_periods_dict():
     """Test forecast periods dict for Home Assistant compatibility."""
     assert set(FORECAST_PERIODS.keys()) == {
@@ -69,3 +112,71 @@ def test_forecast_periods_dict():
     for info in FORECAST_PERIODS.values():
         assert isinstance(info["days"], int)
         assert isinstance(info["name"], str)
+
+
+def test_unchanged_days_are_not_written():
+    """Test only sensors whose day changed write their state on a refresh."""
+    today = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    tomorrow = today + timedelta(days=1)
+
+    def response(tomorrow_volume):
+        return {
+            "hydra:member": [
+                make_entry(today.isoformat(), (today + timedelta(hours=1)).isoformat(), 5),
+                make_entry(tomorrow.isoformat(), (tomorrow + timedelta(hours=1)).isoformat(), tomorrow_volume),
+            ]
+        }
+
+    coordinator = MockCoordinator(response(7))
+    sensors = [
+        PVForecastSensor(
+            coordinator,
+            period_id=period_id,
+            days_ahead=FORECAST_PERIODS[period_id]["days"],
+            period_name=FORECAST_PERIODS[period_id]["name"],
+            entry_id="test",
+        )
+        for period_id in ("today", "tomorrow")
+    ]
+    writes = []
+    for sensor in sensors:
+        sensor.async_write_ha_state = lambda sensor=sensor: writes.append(sensor)
+        sensor._handle_coordinator_update()  # pylint: disable=protected-access
+    assert writes == sensors
+
+    writes.clear()
+    coordinator.data = response(7)  # Same forecast, new response
+    for sensor in sensors:
+        sensor._handle_coordinator_update()  # pylint: disable=protected-access
+    assert not writes
+
+    coordinator.data = response(8)
+    for sensor in sensors:
+        sensor._handle_coordinator_update()  # pylint: disable=protected-access
+    assert writes == [sensors[1]]
+
+
+@pytest.mark.asyncio
+async def test_get_detail_only_for_forecast_sensors():
+    """Test get_detail answers for forecast sensors and rejects diagnostic ones."""
+    today = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    coordinator = MockCoordinator(
+        {"hydra:member": [make_entry(today.isoformat(), (today + timedelta(hours=1)).isoformat(), 5)]}
+    )
+    forecast_sensor = PVForecastSensor(
+        coordinator, period_id="today", days_ahead=0, period_name="Today", entry_id="test"
+    )
+    diagnostic_sensor = PVForecastDiagnosticSensor(
+        coordinator,
+        sensor_id="fetch_latency",
+        sensor_info=DIAGNOSTIC_SENSORS["fetch_latency"],
+        entry_id="test",
+    )
+    diagnostic_sensor.entity_id = "sensor.pv_forecast_ned_nl_fetch_latency"
+    call = ServiceCall(DOMAIN, SERVICE_GET_DETAIL, {})
+
+    detail = await _async_get_detail(forecast_sensor, call)
+    assert detail["forecast_date"] == today.date().isoformat()
+    assert [entry["volume"] for entry in detail["hourly_data"]] == [5]
+    with pytest.raises(ServiceValidationError):
+        await _async_get_detail(diagnostic_sensor, call)
@@ -0,0 +1,119 @@
+"""Test the get_forecast service action."""
+from datetime import datetime, timedelta, timezone
+
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.util import dt as dt_util
+import pytest
+
+from custom_components.pv_forecast.resample import resample
+from custom_components.pv_forecast.services import get_forecast
+from tests.test_sensor_compat import MockCoordinator, make_entry
+
+
+def hourly_coordinator(granularity="Hour"):
+    """Return a coordinator with a forecast for every hour of a day."""
+    start = datetime(2025, 7, 20, tzinfo=timezone.utc)
+    coordinator = MockCoordinator(
+        {
+            "hydra:member": [
+                make_entry(
+                    (start + timedelta(hours=hour)).isoformat(),
+                    (start + timedelta(hours=hour + 1)).isoformat(),
+                    hour,
+                )
+                for hour in range(24)
+            ]
+        }
+    )
+    coordinator.granularity = granularity
+    return coordinator
+
+
+def test_get_forecast_range():
+    """Test a range is served from the index and summed to a granularity."""
+    coordinators = [hourly_coordinator()]
+    call = {
+        "start": datetime(2025, 7, 20, 10, tzinfo=timezone.utc),
+        "end": datetime(2025, 7, 20, 12, tzinfo=timezone.utc),
+    }
+
+    response = get_forecast(coordinators, call)
+    forecast = response["provinces"]["Groningen"]
+    assert forecast["granularity"] == "Hour"
+    assert [entry["volume"] for entry in forecast["forecast"]] == [10, 11]
+    assert forecast["forecast"][0]["valid_from"] == "2025-07-20T10:00:00+00:00"
+    # Repeated ranges are answered from the cache
+    assert get_forecast(coordinators, call)["provinces"]["Groningen"]["forecast"] is (
+        forecast["forecast"]
+    )
+
+    daily = get_forecast(
+        coordinators, {"start": datetime(2025, 7, 20, tzinfo=timezone.utc), "granularity": "Day"}
+    )["provinces"]["Groningen"]["forecast"]
+    assert daily == [
+        {
+            "valid_from": "2025-07-20T00:00:00+00:00",
+            "valid_to": "2025-07-21T00:00:00+00:00",
+            "volume": sum(range(24)),
+        }
+    ]
+
+
+def test_get_forecast_days_are_local():
+    """Test days start at local midnight, whichever entry serves them."""
+    start = datetime(2025, 7, 19, tzinfo=timezone.utc)
+    hourly = {
+        "hydra:member": [
+            make_entry(
+                (start + timedelta(hours=hour)).isoformat(),
+                (start + timedelta(hours=hour + 1)).isoformat(),
+                hour % 24,
+            )
+            for hour in range(72)
+        ]
+    }
+    call = {
+        "start": datetime(2025, 7, 19, 22, tzinfo=timezone.utc),
+        "end": datetime(2025, 7, 21, 22, tzinfo=timezone.utc),
+        "granularity": "Day",
+    }
+
+    dt_util.set_default_time_zone(dt_util.get_time_zone("Europe/Amsterdam"))
+    try:
+        hour_entry = MockCoordinator(hourly)
+        # A Day entry sums the hours it fetched itself
+        day_entry = MockCoordinator(resample(hourly, "Day"))
+        day_entry.granularity = "Day"
+        forecasts = [
+            get_forecast([coordinator], call)["provinces"]["Groningen"]["forecast"]
+            for coordinator in (hour_entry, day_entry)
+        ]
+    finally:
+        dt_util.set_default_time_zone(dt_util.UTC)
+
+    # Local midnight is 22:00 UTC, so each day has the last two hours of a UTC day
+    assert forecasts[0] == forecasts[1] == [
+        {
+            "valid_from": "2025-07-19T22:00:00+00:00",
+            "valid_to": "2025-07-20T22:00:00+00:00",
+            "volume": 22 + 23 + sum(range(22)),
+        },
+        {
+            "valid_from": "2025-07-20T22:00:00+00:00",
+            "valid_to": "2025-07-21T22:00:00+00:00",
+            "volume": 22 + 23 + sum(range(22)),
+        },
+    ]
+
+
+def test_get_forecast_invalid():
+    """Test calls that cannot be answered are rejected."""
+    coordinators = [hourly_coordinator()]
+    start = datetime(2025, 7, 20, tzinfo=timezone.utc)
+
+    with pytest.raises(ServiceValidationError):
+        get_forecast(coordinators, {"start": start, "provinces": ["Utrecht"]})
+    with pytest.raises(ServiceValidationError):
+        get_forecast(coordinators, {"start": start, "granularity": "15 minutes"})
+    with pytest.raises(ServiceValidationError):
+        get_forecast(coordinators, {"start": start, "end": start})
@@ -0,0 +1,53 @@
+"""Test the local time-series store."""
+from datetime import datetime, timezone
+
+from custom_components.pv_forecast.timeseries import ForecastStore, SeriesKey
+
+KEY = SeriesKey(point=7, type=2, classification=1, granularity=5)
+
+
+def make_entry(hour, volume):
+    """Create a mock hourly API entry on 2025-07-20."""
+    return {
+        "validfrom": f"2025-07-20T{hour:02d}:00:00+00:00",
+        "validto": f"2025-07-20T{hour + 1:02d}:00:00+00:00",
+        "volume": volume,
+    }
+
+
+def utc(hour):
+    """Return an hour on 2025-07-20 in UTC."""
+    return datetime(2025, 7, 20, hour, tzinfo=timezone.utc)
+
+
+def test_upsert_and_query(tmp_path):
+    """Test entries are stored, replaced on conflict and queried by range."""
+    with ForecastStore(str(tmp_path / "pv.db")) as store:
+        assert store.upsert(KEY, [make_entry(hour, hour) for hour in range(10, 14)]) == 4
+        assert store.upsert(KEY, [make_entry(11, "42.5")]) == 1
+
+        assert store.query(KEY, utc(11), utc(13)) == [
+            make_entry(11, 42.5),
+            make_entry(12, 12.0),
+        ]
+        assert store.query(KEY._replace(point=8), utc(0), utc(23)) == []
+
+
+def test_covers(tmp_path):
+    """Test a range is covered only when every interval is stored."""
+    with ForecastStore(str(tmp_path / "pv.db")) as store:
+        store.upsert(KEY, [make_entry(hour, hour) for hour in range(10, 14)])
+
+        assert store.covers(KEY, utc(10), utc(14))
+        assert store.covers(KEY, utc(11), utc(13), max_age=60)
+        assert not store.covers(KEY, utc(9), utc(14))
+        assert not store.covers(KEY, utc(10), utc(14), max_age=-1)
+
+
+def test_reopen(tmp_path):
+    """Test stored entries survive reopening the store."""
+    path = str(tmp_path / "pv.db")
+    with ForecastStore(path) as store:
+        store.upsert(KEY, [make_entry(10, 1)])
+    with ForecastStore(path) as store:
+        assert store.query(KEY, utc(0), utc(23)) == [make_entry(10, 1.0)]